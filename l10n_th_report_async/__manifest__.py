@@ -0,0 +1,21 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+{
+    "name": "Thailand Localization - Background Reports",
+    "version": "13.0.1.0.0",
+    "author": "Ecosoft, Odoo Community Association (OCA)",
+    "website": "https://github.com/OCA/l10n-thailand",
+    "license": "AGPL-3",
+    "category": "Reporting",
+    "depends": ["mail"],
+    "data": [
+        "security/ir.model.access.csv",
+        "security/report_async_security.xml",
+        "data/ir_cron.xml",
+        "views/report_async_job_views.xml",
+    ],
+    "installable": True,
+    "development_status": "Alpha",
+    "maintainers": ["kittiu"],
+}
@@ -0,0 +1,4 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from . import report_async_job
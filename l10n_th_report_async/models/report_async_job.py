@@ -0,0 +1,226 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import base64
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Default minutes after which a running job is considered dead, i.e., the
+# worker was killed, and is marked as failed
+DEFAULT_JOB_TIMEOUT = 60
+
+
+class ReportAsyncJob(models.Model):
+    _name = "report.async.job"
+    _inherit = ["mail.thread"]
+    _description = "Background Report Job"
+    _order = "id desc"
+
+    name = fields.Char(required=True, readonly=True)
+    user_id = fields.Many2one(
+        comodel_name="res.users",
+        string="Requested By",
+        default=lambda self: self.env.user,
+        required=True,
+        readonly=True,
+    )
+    company_id = fields.Many2one(
+        comodel_name="res.company",
+        default=lambda self: self.env.company,
+        required=True,
+        readonly=True,
+    )
+    res_model = fields.Char(
+        string="Report Model",
+        required=True,
+        readonly=True,
+        help="Model with _get_report_action(report_type), i.e., report.tax.report",
+    )
+    report_vals = fields.Text(
+        readonly=True, help="JSON values to create the report record when job run"
+    )
+    report_type = fields.Char(required=True, readonly=True)
+    state = fields.Selection(
+        selection=[
+            ("queued", "Queued"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        default="queued",
+        required=True,
+        readonly=True,
+        tracking=True,
+    )
+    attachment_id = fields.Many2one(
+        comodel_name="ir.attachment", string="Report File", readonly=True
+    )
+    date_queued = fields.Datetime(default=fields.Datetime.now, readonly=True)
+    date_started = fields.Datetime(readonly=True)
+    date_done = fields.Datetime(readonly=True)
+    duration = fields.Float(string="Duration (sec)", readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.model
+    def _create_job(self, res_model, report_vals, report_type, name, company=None):
+        """ Queue a report rendered in company (default current company),
+        return the job. Users can only read jobs, job is created with sudo """
+        return self.sudo().create(
+            {
+                "name": name,
+                "user_id": self.env.user.id,
+                "company_id": (company or self.env.company).id,
+                "res_model": res_model,
+                "report_vals": json.dumps(report_vals, default=str),
+                "report_type": report_type,
+            }
+        )
+
+    @api.model
+    def create_job(self, res_model, report_vals, report_type, name):
+        """ Queue a report, return action to open the job """
+        job = self._create_job(res_model, report_vals, report_type, name)
+        return {
+            "name": _("Background Report"),
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": job.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def _commit(self):
+        if not getattr(threading.currentThread(), "testing", False):
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    @api.model
+    def _fail_timed_out_jobs(self):
+        """ Job still running after the timeout lost its worker """
+        timeout = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("l10n_th_report_async.job_timeout", DEFAULT_JOB_TIMEOUT)
+        )
+        date_limit = fields.Datetime.now() - timedelta(minutes=timeout)
+        jobs = self.sudo().search(
+            [("state", "=", "running"), ("date_started", "<", date_limit)]
+        )
+        for job in jobs:
+            job.write(
+                {
+                    "state": "failed",
+                    "error": _("Job timed out after %s minutes.") % timeout,
+                    "date_done": fields.Datetime.now(),
+                }
+            )
+            job.message_post(
+                body=_("Report %s failed: %s") % (job.name, job.error),
+                partner_ids=job.user_id.partner_id.ids,
+            )
+        return jobs
+
+    @api.model
+    def _claim_job(self):
+        """ Mark the next queued job running and commit, jobs locked by other
+        runners are skipped, so each scheduled action running this is a
+        runner and jobs are rendered by all runners at the same time """
+        self.flush()
+        self._cr.execute(
+            """
+            select id from report_async_job
+            where state = 'queued'
+            order by id
+            limit 1
+            for update skip locked
+        """
+        )
+        row = self._cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.sudo().browse(row[0])
+        # Running state is committed, so a job lost with its worker
+        # is failed by timeout instead of staying queued
+        job.write({"state": "running", "date_started": fields.Datetime.now()})
+        job._commit()
+        return job
+
+    @api.model
+    def _cron_run_jobs(self, limit=10):
+        self._fail_timed_out_jobs()
+        self._commit()
+        for _i in range(limit):
+            job = self._claim_job()
+            if not job:
+                break
+            job._run()
+            # Each job keep its own result, even if next job fails
+            job._commit()
+        return True
+
+    def _render(self):
+        """ Create report record as the requesting user and render it """
+        self.ensure_one()
+        Report = self.env[self.res_model].with_user(self.user_id)
+        Report = Report.with_context(allowed_company_ids=self.company_id.ids)
+        report = Report.create(json.loads(self.report_vals or "{}"))
+        action = report._get_report_action(self.report_type)
+        content, ext = action.render(report.ids)
+        return content, ext
+
+    def _run(self):
+        self.ensure_one()
+        if self.state != "running":
+            self.write({"state": "running", "date_started": fields.Datetime.now()})
+        start = time.time()
+        try:
+            with self.env.cr.savepoint():
+                content, ext = self._render()
+                attachment = self.env["ir.attachment"].create(
+                    {
+                        "name": "{}.{}".format(self.name, ext),
+                        "datas": base64.b64encode(content),
+                        "res_model": self._name,
+                        "res_id": self.id,
+                    }
+                )
+        except Exception as e:
+            _logger.exception("Background report %s failed", self.name)
+            self.write(
+                {
+                    "state": "failed",
+                    "error": str(e),
+                    "date_done": fields.Datetime.now(),
+                    "duration": time.time() - start,
+                }
+            )
+            body = _("Report %s failed: %s") % (self.name, e)
+        else:
+            self.write(
+                {
+                    "state": "done",
+                    "attachment_id": attachment.id,
+                    "date_done": fields.Datetime.now(),
+                    "duration": time.time() - start,
+                }
+            )
+            body = _("Report %s is ready.") % self.name
+        self.message_post(
+            body=body,
+            partner_ids=self.user_id.partner_id.ids,
+            attachment_ids=self.attachment_id.ids,
+        )
+
+    def action_requeue(self):
+        """ Users can read their own jobs only, requeue with sudo """
+        self.check_access_rights("read")
+        self.check_access_rule("read")
+        jobs = self.filtered(lambda l: l.state == "failed")
+        jobs.sudo().write({"state": "queued", "error": False})
+        return True
@@ -3,7 +3,7 @@
 
 {
     "name": "Thai Localization - Account Tax Invoice",
-    "version": "13.0.2.2.3",
+    "version": "13.0.2.3.0",
     "author": "Ecosoft,Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/l10n-thailand/",
@@ -11,9 +11,14 @@
     "depends": ["account"],
     "data": [
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "views/account_view.xml",
         "views/account_move_view.xml",
         "views/account_payment_view.xml",
+        "views/res_config_settings_view.xml",
+        "wizard/tax_invoice_report_month_view.xml",
+        "wizard/clear_tax_cash_basis_view.xml",
+        "wizard/tax_invoice_import_view.xml",
     ],
     "installable": True,
     "development_status": "Alpha",
@@ -0,0 +1,67 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import logging
+import time
+
+from psycopg2 import sql
+
+_logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 50000
+
+
+def chunked_update(
+    cr,
+    table,
+    set_clause,
+    from_clause="",
+    where_clause="TRUE",
+    params=None,
+    batch_size=BACKFILL_BATCH_SIZE,
+    commit=False,
+):
+    """ Backfill big table by id range batches, so that each UPDATE is short
+
+    Statement run for each batch is::
+
+        UPDATE <table> t SET <set_clause> [FROM <from_clause>]
+        WHERE t.id >= <start> AND t.id < <start + batch_size> AND <where_clause>
+
+    :param table: table to update, aliased as ``t`` in all clauses
+    :param set_clause: i.e., ``"partner_id = ml.partner_id"``
+    :param from_clause: i.e., ``"account_move_line ml"``, join condition
+        goes into ``where_clause``
+    :param params: parameters of the clauses, in order of appearance
+    :param commit: commit after each batch, so row locks are released
+        early. Only use it when the update can be run again safely
+    :return: number of updated rows
+    """
+    cr.execute(sql.SQL("SELECT min(id), max(id) FROM {}").format(sql.Identifier(table)))
+    min_id, max_id = cr.fetchone()
+    if min_id is None:
+        return 0
+    query = sql.SQL(
+        "UPDATE {table} t SET {set_clause} {from_clause} "
+        "WHERE t.id >= %s AND t.id < %s AND ({where_clause})"
+    ).format(
+        table=sql.Identifier(table),
+        set_clause=sql.SQL(set_clause),
+        from_clause=sql.SQL(from_clause and "FROM " + from_clause),
+        where_clause=sql.SQL(where_clause),
+    )
+    total = 0
+    start_time = time.time()
+    for start in range(min_id, max_id + 1, batch_size):
+        cr.execute(query, list(params or []) + [start, start + batch_size])
+        total += cr.rowcount
+        if commit:
+            cr.commit()
+        _logger.info(
+            "%s: %s rows updated, id %s/%s, %.1fs",
+            table,
+            total,
+            min(start + batch_size - 1, max_id),
+            max_id,
+            time.time() - start_time,
+        )
+    return total
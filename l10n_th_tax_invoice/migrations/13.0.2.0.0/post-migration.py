@@ -4,17 +4,20 @@ import logging
 
 from odoo import SUPERUSER_ID, api
 
+from odoo.addons.l10n_th_tax_invoice.migration_tools import chunked_update
+
 _logger = logging.getLogger(__name__)
 
 
 def _auto_update_field_partner_id(env):
     _logger.info("Auto update new field 'partner_id' on upgrade to 13.0.2.0.0")
-    env.cr.execute(
-        """
-        update account_move_tax_invoice tv set partner_id = (
-            select partner_id from account_move_line where id = tv.move_line_id)
-        where partner_id is null
-    """
+    chunked_update(
+        env.cr,
+        "account_move_tax_invoice",
+        "partner_id = ml.partner_id",
+        from_clause="account_move_line ml",
+        where_clause="ml.id = t.move_line_id AND t.partner_id IS NULL",
+        commit=True,  # Update can run again, release row locks by batch
     )
 
 
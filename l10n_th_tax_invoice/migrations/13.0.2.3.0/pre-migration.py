@@ -0,0 +1,33 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import logging
+
+from odoo.tools.sql import column_exists, create_column
+
+from odoo.addons.l10n_th_tax_invoice.migration_tools import chunked_update
+from odoo.addons.l10n_th_tax_invoice.models.account_move import (
+    TAX_INVOICE_NUMBER_NORM_SQL,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+def _fill_tax_invoice_number_norm(cr):
+    """ Create and fill new stored compute field in SQL, so the ORM does not
+    recompute it record by record on upgrade """
+    if column_exists(cr, "account_move_tax_invoice", "tax_invoice_number_norm"):
+        return
+    _logger.info("Fill new field 'tax_invoice_number_norm' on upgrade to 13.0.2.3.0")
+    create_column(cr, "account_move_tax_invoice", "tax_invoice_number_norm", "varchar")
+    chunked_update(
+        cr,
+        "account_move_tax_invoice",
+        "tax_invoice_number_norm = {}".format(
+            TAX_INVOICE_NUMBER_NORM_SQL.format("t.tax_invoice_number")
+        ),
+        where_clause="t.tax_invoice_number IS NOT NULL",
+    )
+
+
+def migrate(cr, version):
+    _fill_tax_invoice_number_norm(cr)
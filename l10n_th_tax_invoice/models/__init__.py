@@ -3,3 +3,6 @@
 from . import account
 from . import account_move
 from . import account_payment
+from . import ir_sequence
+from . import res_company
+from . import tax_invoice_allocator
@@ -12,6 +12,9 @@ class AccountTax(models.Model):
         help="Optional sequence as Tax Invoice number",
         copy=False,
     )
+    taxinv_allocate_after_commit = fields.Boolean(
+        related="taxinv_sequence_id.allocate_after_commit", readonly=False
+    )
     sequence_number_next = fields.Integer(
         string="Next Number",
         help="The next sequence number will be used for the next tax invoice.",
@@ -23,15 +26,19 @@ class AccountTax(models.Model):
         "taxinv_sequence_id.use_date_range", "taxinv_sequence_id.number_next_actual"
     )
     def _compute_seq_number_next(self):
+        """ Current sequences of all taxes are looked up at once,
+        the computed value stays in cache for the rest of the request """
+        sequences = self.mapped("taxinv_sequence_id")._get_current_sequences()
         for tax in self:
             if tax.taxinv_sequence_id:
-                sequence = tax.taxinv_sequence_id._get_current_sequence()
+                sequence = sequences[tax.taxinv_sequence_id.id]
                 tax.sequence_number_next = sequence.number_next_actual
             else:
                 tax.sequence_number_next = 1
 
     def _inverse_seq_number_next(self):
-        for tax in self:
-            if tax.taxinv_sequence_id and tax.sequence_number_next:
-                sequence = tax.taxinv_sequence_id._get_current_sequence()
-                sequence.sudo().number_next = tax.sequence_number_next
+        taxes = self.filtered(lambda l: l.taxinv_sequence_id and l.sequence_number_next)
+        sequences = taxes.mapped("taxinv_sequence_id")._get_current_sequences()
+        for tax in taxes:
+            sequence = sequences[tax.taxinv_sequence_id.id]
+            sequence.sudo().number_next = tax.sequence_number_next
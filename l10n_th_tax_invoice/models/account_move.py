@@ -2,12 +2,41 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 import calendar
 import datetime
+import re
+import time
 
 from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import float_compare
+
+TAX_INVOICE_INDEXES = {
+    "account_move_tax_invoice_report_date_idx": """
+        (company_id, report_date)
+        WHERE reversed_id IS NULL AND tax_invoice_number IS NOT NULL
+    """,
+    "account_move_tax_invoice_partner_number_norm_idx": """
+        (partner_id, tax_invoice_number_norm)
+        WHERE tax_invoice_number_norm IS NOT NULL
+    """,
+    "account_move_tax_invoice_unfilled_idx": """
+        (company_id)
+        WHERE (tax_invoice_number IS NULL OR tax_invoice_date IS NULL)
+        AND reversed_id IS NULL AND reversing_id IS NULL
+    """,
+}
+# SQL of tax_invoice_number_norm, same as _compute_tax_invoice_number_norm
+TAX_INVOICE_NUMBER_NORM_SQL = (
+    "nullif(upper(regexp_replace({}, '[\\W_]+', '', 'g')), '')"
+)
+# Import tax invoice, match draft moves by number or reference
+MOVE_INDEXES = {
+    "account_move_draft_name_idx": "(name) WHERE state = 'draft'",
+    "account_move_draft_ref_idx": "(ref) WHERE state = 'draft'",
+}
+DASHBOARD_CACHE_TTL = 30  # seconds
+DASHBOARD_MONTHS = 12
+_dashboard_cache = {}
 
 
 class AccountMoveTaxInvoice(models.Model):
@@ -16,6 +45,17 @@ class AccountMoveTaxInvoice(models.Model):
 
     tax_invoice_number = fields.Char(string="Tax Invoice Number", copy=False)
     tax_invoice_date = fields.Date(string="Tax Invoice Date", copy=False)
+    number_pending = fields.Boolean(
+        copy=False,
+        help="Tax invoice number will be allocated after posting is committed",
+    )
+    tax_invoice_number_norm = fields.Char(
+        string="Normalized Tax Invoice Number",
+        compute="_compute_tax_invoice_number_norm",
+        store=True,
+        help="Tax invoice number without spaces and symbols, in upper case. "
+        "Used to find duplicate tax invoice",
+    )
     report_late_mo = fields.Selection(
         [
             ("0", "0 month"),
@@ -77,15 +117,214 @@ class AccountMoveTaxInvoice(models.Model):
         comodel_name="account.move", help="This move that this move reverse"
     )
 
-    @api.depends("move_line_id")
-    def _compute_payment_id(self):
+    def init(self):
+        """ Partial indexes matching the queries on tax invoices
+        - Tax report summary refresh and dashboard VAT by month, read valid
+          tax invoices of a company by report_date. Tax report itself reads
+          the summary table
+        - Duplicate check, by partner and normalized number
+        - Dashboard, tax invoices not yet filled in """
+        for indexname, definition in TAX_INVOICE_INDEXES.items():
+            self._cr.execute(
+                "SELECT indexname FROM pg_indexes WHERE indexname = %s", (indexname,)
+            )
+            if not self._cr.fetchone():
+                self._cr.execute(
+                    "CREATE INDEX {} ON account_move_tax_invoice {}".format(
+                        indexname, definition
+                    )
+                )
+
+    @api.depends("tax_invoice_number")
+    def _compute_tax_invoice_number_norm(self):
         for rec in self:
-            if not rec.payment_id:
-                origin_move = rec.move_id.reversed_entry_id
-                payment = origin_move.tax_invoice_ids.mapped("payment_id")
-                rec.payment_id = (
-                    payment and payment.id or self._context.get("payment_id", False)
+            number = re.sub(r"[\W_]+", "", rec.tax_invoice_number or "")
+            rec.tax_invoice_number_norm = number.upper() or False
+
+    @api.model
+    def _get_duplicate_groups(self):
+        """ Return [ids], each list is posted tax invoices of the same partner
+        and normalized number but from different moves """
+        self.flush(
+            ["partner_id", "tax_invoice_number_norm", "move_id", "move_state"]
+            + ["reversed_id", "reversing_id"]
+        )
+        self._cr.execute(
+            """
+            select array_agg(t.id order by t.id)
+            from account_move_tax_invoice t
+            where t.tax_invoice_number_norm is not null
+              and t.partner_id is not null
+              and t.reversed_id is null and t.reversing_id is null
+              and t.move_state = 'posted'
+            group by t.partner_id, t.tax_invoice_number_norm
+            having count(distinct t.move_id) > 1
+        """
+        )
+        return [row[0] for row in self._cr.fetchall()]
+
+    def _check_duplicate_tax_invoice(self):
+        """ Vendor tax invoice number must not be used twice by same partner """
+        tax_invoices = self.filtered(
+            lambda l: l.company_id.check_duplicate_tax_invoice
+            and l.tax_line_id.type_tax_use == "purchase"
+            and l.tax_invoice_number_norm
+            and not l.reversed_id
+        )
+        if not tax_invoices:
+            return
+        self.flush(["partner_id", "tax_invoice_number_norm"])
+        self._cr.execute(
+            """
+            select distinct t.id
+            from account_move_tax_invoice t
+              join account_move_tax_invoice d
+                on d.partner_id = t.partner_id
+                and d.tax_invoice_number_norm = t.tax_invoice_number_norm
+                and d.move_id != t.move_id
+            where t.id in %s
+              and d.reversed_id is null and d.reversing_id is null
+              and (d.move_state = 'posted' or d.id in %s)
+        """,
+            (tuple(tax_invoices.ids), tuple(tax_invoices.ids)),
+        )
+        duplicate_ids = [row[0] for row in self._cr.fetchall()]
+        if duplicate_ids:
+            duplicates = self.browse(duplicate_ids)
+            raise UserError(
+                _("Duplicate tax invoice number for the same partner\n%s")
+                % "\n".join(
+                    "{} - {}".format(l.partner_id.display_name, l.tax_invoice_number)
+                    for l in duplicates
                 )
+            )
+
+    @api.model
+    def action_view_duplicate(self):
+        """ Audit, show all duplicate tax invoices found by one grouped query """
+        groups = self._get_duplicate_groups()
+        ids = [taxinv_id for group in groups for taxinv_id in group]
+        return {
+            "name": _("Duplicate Tax Invoices"),
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "view_mode": "tree,form",
+            "domain": [("id", "in", ids)],
+            "context": {"group_by": ["partner_id", "tax_invoice_number_norm"]},
+        }
+
+    @api.model
+    def get_dashboard_stats(self):
+        """ Aggregates of current companies for finance dashboard, i.e.,
+        {"unfilled": {"count", "amount"}, "to_clear_tax": count,
+        "vat_by_month": [{"month", "sale", "purchase"}]}
+        Result is cached for DASHBOARD_CACHE_TTL seconds """
+        self.check_access_rights("read")
+        company_ids = tuple(sorted(self.env.companies.ids))
+        key = (self._cr.dbname, company_ids)
+        now = time.time()
+        cached = _dashboard_cache.get(key)
+        if cached and now - cached[0] < DASHBOARD_CACHE_TTL:
+            return cached[1]
+        stats = self._get_dashboard_stats(company_ids)
+        _dashboard_cache[key] = (now, stats)
+        return stats
+
+    @api.model
+    def _get_dashboard_stats(self, company_ids):
+        """ One query per aggregate, each is served by a partial index """
+        # Purchase tax invoices waiting for vendor's number / date
+        self._cr.execute(
+            """
+            select count(*), coalesce(sum(t.balance), 0)
+            from account_move_tax_invoice t
+            join account_move_line ml on ml.id = t.move_line_id
+            join account_tax tax on tax.id = ml.tax_line_id
+            where t.company_id in %s
+              and (t.tax_invoice_number is null or t.tax_invoice_date is null)
+              and t.reversed_id is null and t.reversing_id is null
+              and t.move_state != 'cancel' and tax.type_tax_use = 'purchase'
+        """,
+            (company_ids,),
+        )
+        unfilled_count, unfilled_amount = self._cr.fetchone()
+        # Payments with deferred cash basis entry
+        self._cr.execute(
+            """
+            select count(*)
+            from account_payment p
+            join account_journal j on j.id = p.journal_id
+            where p.to_clear_tax and p.state = 'posted' and j.company_id in %s
+        """,
+            (company_ids,),
+        )
+        to_clear_tax = self._cr.fetchone()[0]
+        # VAT by report month
+        date_from = fields.Date.today().replace(day=1) - relativedelta(
+            months=DASHBOARD_MONTHS - 1
+        )
+        self._cr.execute(
+            """
+            select date_trunc('month', t.report_date)::date as month,
+                sum(t.balance) filter (where tax.type_tax_use = 'sale'),
+                sum(t.balance) filter (where tax.type_tax_use = 'purchase')
+            from account_move_tax_invoice t
+            join account_move_line ml on ml.id = t.move_line_id
+            join account_tax tax on tax.id = ml.tax_line_id
+            where t.company_id in %s and t.report_date >= %s
+              and t.move_state = 'posted' and t.tax_invoice_number is not null
+              and t.reversed_id is null and t.reversing_id is null
+            group by month
+            order by month
+        """,
+            (company_ids, date_from),
+        )
+        vat_by_month = [
+            {
+                "month": fields.Date.to_string(month),
+                "sale": sale or 0.0,
+                "purchase": purchase or 0.0,
+            }
+            for month, sale, purchase in self._cr.fetchall()
+        ]
+        return {
+            "unfilled": {"count": unfilled_count, "amount": unfilled_amount},
+            "to_clear_tax": to_clear_tax,
+            "vat_by_month": vat_by_month,
+        }
+
+    @api.depends("move_line_id")
+    def _compute_payment_id(self):
+        records = self.filtered(lambda l: not l.payment_id)
+        origin_moves = records.mapped("move_id.reversed_entry_id")
+        payments = records._get_origin_payment_ids(origin_moves)
+        for rec in records:
+            origin_move = rec.move_id.reversed_entry_id
+            rec.payment_id = payments.get(origin_move.id) or self._context.get(
+                "payment_id", False
+            )
+
+    @api.model
+    def _get_origin_payment_ids(self, origin_moves):
+        """ Return {origin_move_id: payment_id} with one query """
+        move_ids = [mid for mid in origin_moves.ids if isinstance(mid, int)]
+        if not move_ids:
+            return {}
+        # Payment of origin tax invoices may still be pending in this transaction
+        self.env["account.move.tax.invoice"].flush(
+            ["payment_id", "move_id"],
+            records=origin_moves.mapped("tax_invoice_ids"),
+        )
+        self._cr.execute(
+            """
+            select move_id, min(payment_id)
+            from account_move_tax_invoice
+            where move_id in %s and payment_id is not null
+            group by move_id
+        """,
+            (tuple(move_ids),),
+        )
+        return dict(self._cr.fetchall())
 
     @api.depends("report_late_mo", "tax_invoice_date")
     def _compute_report_date(self):
@@ -101,6 +340,81 @@ class AccountMoveTaxInvoice(models.Model):
             else:
                 rec.report_date = False
 
+    def _update_report_date(self):
+        """ Bulk recompute of report_date with one SQL UPDATE,
+        same result as _compute_report_date """
+        if not self:
+            return
+        self.flush(["tax_invoice_date", "report_late_mo"])
+        self._cr.execute(
+            """
+            update account_move_tax_invoice
+            set report_date = (
+                date_trunc('month', tax_invoice_date
+                    + (report_late_mo || ' month')::interval)
+                + interval '1 month - 1 day')::date
+            where id in %s
+        """,
+            (tuple(self.ids),),
+        )
+        self.invalidate_cache(["report_date"], self.ids)
+
+    @api.model
+    def _write_number_date(self, values):
+        """ Write number and date of many tax invoices with one SQL UPDATE,
+        i.e., {tax_invoice_id: (number, date)}, computed fields are updated
+        the same as by ORM, and fields depending on number and date in other
+        modules are marked to recompute.
+
+        As write() is not called, its overrides and field tracking are
+        skipped, extend this method to act on the written numbers """
+        if not values:
+            return
+        records = self.browse(list(values))
+        records.check_access_rights("write")
+        records.check_access_rule("write")
+        records.flush(
+            ["tax_invoice_number", "tax_invoice_date", "tax_invoice_number_norm"]
+        )
+        ids = list(values)
+        numbers = [values[taxinv_id][0] for taxinv_id in ids]
+        dates = [values[taxinv_id][1] for taxinv_id in ids]
+        query = """
+            update account_move_tax_invoice t
+            set tax_invoice_number = v.number,
+                tax_invoice_date = v.date,
+                tax_invoice_number_norm = {},
+                write_uid = %s,
+                write_date = now() at time zone 'UTC'
+            from unnest(%s::int[], %s::varchar[], %s::date[]) as v(id, number, date)
+            where t.id = v.id
+        """.format(TAX_INVOICE_NUMBER_NORM_SQL.format("v.number"))
+        self._cr.execute(query, (self.env.uid, ids, numbers, dates))
+        records.invalidate_cache(
+            ["tax_invoice_number", "tax_invoice_date", "tax_invoice_number_norm"]
+            + ["write_uid", "write_date"],
+            records.ids,
+        )
+        # Trigger dependants as write() does, except fields updated here
+        records.modified(["tax_invoice_number", "tax_invoice_date"])
+        for fname in ["tax_invoice_number_norm", "report_date"]:
+            self.env.remove_todo(self._fields[fname], records)
+        records._update_report_date()
+
+    def _set_report_late_mo(self, report_late_mo):
+        """ Change report_late_mo of many tax invoices at once """
+        if not self:
+            return
+        self.check_access_rights("write")
+        self.check_access_rule("write")
+        self.flush(["report_late_mo"])
+        self._cr.execute(
+            "update account_move_tax_invoice set report_late_mo = %s where id in %s",
+            (report_late_mo, tuple(self.ids)),
+        )
+        self.invalidate_cache(["report_late_mo"], self.ids)
+        self._update_report_date()
+
     def unlink(self):
         """ Do not allow remove the last tax_invoice of move_line """
         line_taxinv = {}
@@ -126,48 +440,81 @@ class AccountMoveLine(models.Model):
     )
 
     def _checkout_tax_invoice_amount(self):
-        for line in self:
-            if not line.manual_tax_invoice and line.tax_invoice_ids:
-                tax = sum(line.tax_invoice_ids.mapped("balance"))
-                if float_compare(abs(line.balance), abs(tax), 2) != 0:
-                    raise UserError(_("Invalid Tax Amount"))
+        """ Compare tax amount of all lines with their tax invoices in one query,
+        all mismatch lines are reported together """
+        if not self:
+            return
+        self.flush(["balance", "manual_tax_invoice"])
+        self.env["account.move.tax.invoice"].flush(["move_line_id", "balance"])
+        self._cr.execute(
+            """
+            select ml.id
+            from account_move_line ml
+              join account_move_tax_invoice t on t.move_line_id = ml.id
+            where ml.id in %s and not coalesce(ml.manual_tax_invoice, false)
+            group by ml.id, ml.balance
+            having round(abs(ml.balance) - abs(sum(t.balance)), 2) != 0
+        """,
+            (tuple(self.ids),),
+        )
+        line_ids = [row[0] for row in self._cr.fetchall()]
+        if line_ids:
+            lines = self.browse(line_ids)
+            raise UserError(
+                _("Invalid Tax Amount\n%s")
+                % "\n".join(
+                    "{} - {}".format(line.move_id.display_name, line.display_name)
+                    for line in lines
+                )
+            )
+
+    def _prepare_tax_invoice_vals(self, sign=1):
+        """ Hook point to prepare tax invoice values of this move line """
+        self.ensure_one()
+        return {
+            "move_id": self.move_id.id,
+            "move_line_id": self.id,
+            "partner_id": self.partner_id.id,
+            "tax_invoice_number": sign < 0 and "/" or False,
+            "tax_invoice_date": sign < 0 and fields.Date.today() or False,
+            "tax_base_amount": sign * abs(self.tax_base_amount),
+            "balance": sign * abs(self.balance),
+            "reversed_id": (
+                self.move_id.type == "entry"
+                and self.move_id.reversed_entry_id.id
+                or False
+            ),
+        }
 
     def create(self, vals):
         move_lines = super().create(vals)
         TaxInvoice = self.env["account.move.tax.invoice"]
         sign = self._context.get("reverse_tax_invoice") and -1 or 1
-        for line in move_lines:
-            if (line.tax_line_id and line.tax_exigible) or line.manual_tax_invoice:
-                taxinv = TaxInvoice.create(
-                    {
-                        "move_id": line.move_id.id,
-                        "move_line_id": line.id,
-                        "partner_id": line.partner_id.id,
-                        "tax_invoice_number": sign < 0 and "/" or False,
-                        "tax_invoice_date": sign < 0 and fields.Date.today() or False,
-                        "tax_base_amount": sign * abs(line.tax_base_amount),
-                        "balance": sign * abs(line.balance),
-                        "reversed_id": (
-                            line.move_id.type == "entry"
-                            and line.move_id.reversed_entry_id.id
-                            or False
-                        ),
-                    }
-                )
-                line.tax_invoice_ids |= taxinv
-            # Assign back the reversing id
-            for taxinv in line.tax_invoice_ids.filtered("reversed_id"):
-                TaxInvoice.search([("move_id", "=", taxinv.reversed_id.id)]).write(
-                    {"reversing_id": taxinv.move_id.id}
-                )
+        taxinv_vals = [
+            line._prepare_tax_invoice_vals(sign)
+            for line in move_lines
+            if (line.tax_line_id and line.tax_exigible) or line.manual_tax_invoice
+        ]
+        tax_invoices = TaxInvoice.create(taxinv_vals) if taxinv_vals else TaxInvoice
+        tax_invoices |= move_lines.mapped("tax_invoice_ids")
+        # Assign back the reversing id, one write per reversing move
+        reversed_moves = {}
+        for taxinv in tax_invoices.filtered("reversed_id"):
+            reversed_moves.setdefault(taxinv.move_id.id, set()).add(
+                taxinv.reversed_id.id
+            )
+        for reversing_id, reversed_ids in reversed_moves.items():
+            TaxInvoice.search([("move_id", "in", list(reversed_ids))]).write(
+                {"reversing_id": reversing_id}
+            )
         return move_lines
 
     def write(self, vals):
         if "manual_tax_invoice" in vals:
             if vals["manual_tax_invoice"]:
                 TaxInvoice = self.env["account.move.tax.invoice"]
-                for line in self:
-                    taxinv = TaxInvoice.create(
+                TaxInvoice.create(
+                    [
                         {
                             "move_id": line.move_id.id,
                             "move_line_id": line.id,
@@ -175,8 +522,9 @@ class AccountMoveLine(models.Model):
                             "tax_base_amount": abs(line.tax_base_amount),
                             "balance": abs(line.balance),
                         }
-                    )
-                    line.tax_invoice_ids |= taxinv
+                        for line in self
+                    ]
+                )
             else:
                 self = self.with_context(force_remove_tax_invoice=True)
                 self.mapped("tax_invoice_ids").unlink()
@@ -194,32 +542,39 @@ class AccountMove(models.Model):
         copy=False,
     )
 
+    def init(self):
+        for indexname, definition in MOVE_INDEXES.items():
+            self._cr.execute(
+                "SELECT indexname FROM pg_indexes WHERE indexname = %s", (indexname,)
+            )
+            if not self._cr.fetchone():
+                self._cr.execute(
+                    "CREATE INDEX {} ON account_move {}".format(indexname, definition)
+                )
+
     def post(self):
         """ Additional tax invoice info (tax_invoice_number, tax_invoice_date)
             Case sales tax, use Odoo's info, as document is issued out.
             Case purchase tax, use vendor's info to fill back. """
         # Purchase Taxes
-        for move in self:
-            for tax_invoice in move.tax_invoice_ids.filtered(
-                lambda l: l.tax_line_id.type_tax_use == "purchase"
-                or (
-                    l.move_id.type == "entry"
-                    and not l.payment_id
-                    and l.move_id.journal_id.type != "sale"
-                )
-            ):
-                if (
-                    not tax_invoice.tax_invoice_number
-                    or not tax_invoice.tax_invoice_date
-                ):
-                    if tax_invoice.payment_id:  # Defer posting for payment
-                        tax_invoice.payment_id.write({"to_clear_tax": True})
-                        return False
-                    elif len(move.tax_invoice_ids) > 1:
-                        # Case Invoice reconcile with Refund, not perfect yet!
-                        return False
-                    else:
-                        raise UserError(_("Please fill in tax invoice and tax date"))
+        for tax_invoice in self.mapped("tax_invoice_ids").filtered(
+            lambda l: l.tax_line_id.type_tax_use == "purchase"
+            or (
+                l.move_id.type == "entry"
+                and not l.payment_id
+                and l.move_id.journal_id.type != "sale"
+            )
+        ):
+            if not tax_invoice.tax_invoice_number or not tax_invoice.tax_invoice_date:
+                if tax_invoice.payment_id:  # Defer posting for payment
+                    tax_invoice.payment_id.write({"to_clear_tax": True})
+                    return False
+                elif len(tax_invoice.move_id.tax_invoice_ids) > 1:
+                    # Case Invoice reconcile with Refund, not perfect yet!
+                    return False
+                else:
+                    raise UserError(_("Please fill in tax invoice and tax date"))
+        self.mapped("tax_invoice_ids")._check_duplicate_tax_invoice()
 
         # TOFIX: this operation does cause serious impact in some case.
         # I.e., When a normal invoice with amount 0.0 line, deletion is prohibited,
@@ -248,24 +603,81 @@ class AccountMove(models.Model):
         res = super().post()
 
         # Sales Taxes
-        for move in self:
-            for tax_invoice in move.tax_invoice_ids.filtered(
-                lambda l: l.tax_line_id.type_tax_use == "sale"
-                or l.move_id.journal_id.type == "sale"
-            ):
-                tinv_number, tinv_date = self._get_tax_invoice_number(
-                    move, tax_invoice, tax_invoice.tax_line_id
-                )
-                tax_invoice.write(
-                    {"tax_invoice_number": tinv_number, "tax_invoice_date": tinv_date}
-                )
+        tax_invoices = self.mapped("tax_invoice_ids").filtered(
+            lambda l: l.tax_line_id.type_tax_use == "sale"
+            or l.move_id.journal_id.type == "sale"
+        )
+        # Reversed entry use origin number, so number the origin first
+        reversal = tax_invoices.filtered(
+            lambda l: l.move_id.type == "entry" and l.move_id.reversed_entry_id
+        )
+        if not self._context.get("tax_invoice_allocating"):
+            deferred = tax_invoices.filtered(
+                lambda l: l.tax_line_id.taxinv_sequence_id.allocate_after_commit
+            )
+            self.env["tax.invoice.allocator"]._enqueue(deferred)
+            tax_invoices -= deferred
+            reversal -= deferred
+        self._assign_tax_invoice_number(tax_invoices - reversal)
+        self._assign_tax_invoice_number(reversal)
 
         # Check amount tax invoice with move line
-        for move in self:
-            move.line_ids._checkout_tax_invoice_amount()
+        self.mapped("line_ids")._checkout_tax_invoice_amount()
         return res
 
-    def _get_tax_invoice_number(self, move, tax_invoice, tax):
+    @api.model
+    def _reserve_tax_invoice_numbers(self, tax_invoices):
+        """ Draw all new numbers needed by tax_invoices, one call per sequence
+        and date range, i.e., {tax_invoice_id: number}. Moves of different
+        dates share a block when their dates resolve to the same date range
+        of the sequence """
+        pending = []
+        for tax_invoice in tax_invoices:
+            move = tax_invoice.move_id
+            sequence = tax_invoice.tax_line_id.taxinv_sequence_id
+            number = tax_invoice.tax_invoice_number
+            if move.type in ("out_invoice", "out_refund") and number == "/":
+                number = False
+            if not sequence or number:
+                continue
+            if move.type == "entry" and move.reversed_entry_id:
+                continue
+            pending.append((tax_invoice, sequence, move.date))
+        # Resolve date ranges of all sequences at once for each date
+        sequence_ids = {}
+        for _tinv, sequence, date in pending:
+            sequence_ids.setdefault(date, set()).add(sequence.id)
+        current = {
+            date: self.env["ir.sequence"].browse(list(ids))._get_current_sequences(date)
+            for date, ids in sequence_ids.items()
+        }
+        # Key on the sequence itself, or its date range of the date
+        blocks = {}
+        for tax_invoice, sequence, date in pending:
+            key = current[date][sequence.id]
+            blocks.setdefault(key, [sequence, date, []])[2].append(tax_invoice.id)
+        reserved_numbers = {}
+        for sequence, date, taxinv_ids in blocks.values():
+            numbers = sequence.next_block_by_id(len(taxinv_ids), sequence_date=date)
+            reserved_numbers.update(zip(taxinv_ids, numbers))
+        return reserved_numbers
+
+    @api.model
+    def _assign_tax_invoice_number(self, tax_invoices):
+        """ Number tax_invoices of many moves at once, sequence numbers are
+        reserved by block and written back with one SQL UPDATE """
+        reserved_numbers = self._reserve_tax_invoice_numbers(tax_invoices)
+        values = {}
+        for tax_invoice in tax_invoices:
+            values[tax_invoice.id] = self._get_tax_invoice_number(
+                tax_invoice.move_id,
+                tax_invoice,
+                tax_invoice.tax_line_id,
+                reserved_numbers=reserved_numbers,
+            )
+        self.env["account.move.tax.invoice"]._write_number_date(values)
+
+    def _get_tax_invoice_number(self, move, tax_invoice, tax, reserved_numbers=None):
         """ Tax Invoice Numbering for Customer Invioce / Receipt
         - If type in ("out_invoice", "out_refund")
           - If number is (False, "/"), consider it no valid number then,
@@ -274,6 +686,7 @@ class AccountMove(models.Model):
         - Else,
           - If no number
             - If type = "entry" and has reversed entry, use origin number
+        New sequence number is taken from reserved_numbers when available
         """
         origin_move = move.type == "entry" and move.reversed_entry_id or move
         sequence = tax_invoice.tax_line_id.taxinv_sequence_id
@@ -295,7 +708,10 @@ class AccountMove(models.Model):
                             _("Cannot set tax invoice number, number already exists.")
                         )
                 else:  # Normal case, use new sequence
-                    number = sequence.next_by_id(sequence_date=move.date)
+                    if reserved_numbers and reserved_numbers.get(tax_invoice.id):
+                        number = reserved_numbers[tax_invoice.id]
+                    else:
+                        number = sequence.next_by_id(sequence_date=move.date)
             else:  # Now sequence for this tax, use document number
                 number = tax_invoice.payment_id.name or origin_move.name
         return (number, invoice_date)
@@ -308,7 +724,16 @@ class AccountMove(models.Model):
 
     def unlink(self):
         # Do not unlink cash basis move on payment, they will be reversed
-        moves = self.filtered(lambda m: not (m.type == "entry" and m.tax_invoice_ids))
+        moves = self
+        entries = self.filtered(lambda m: m.type == "entry")
+        if entries:
+            self.env["account.move.tax.invoice"].flush(["move_id"])
+            self._cr.execute(
+                "select distinct move_id from account_move_tax_invoice "
+                "where move_id in %s",
+                (tuple(entries.ids),),
+            )
+            moves -= self.browse([row[0] for row in self._cr.fetchall()])
         return super(AccountMove, moves).unlink()
 
 
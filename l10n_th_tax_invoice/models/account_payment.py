@@ -1,7 +1,15 @@
 # Copyright 2019 Ecosoft Co., Ltd (http://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 from odoo import _, fields, models
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
+
+PAYMENT_INDEXES = {
+    "account_payment_to_clear_tax_idx": "(journal_id) WHERE to_clear_tax",
+    "account_payment_to_clear_tax_name_idx": "(name) WHERE to_clear_tax",
+    "account_payment_to_clear_tax_communication_idx": """
+        (communication) WHERE to_clear_tax
+    """,
+}
 
 
 class AccountPayment(models.Model):
@@ -27,21 +35,90 @@ class AccountPayment(models.Model):
         compute="_compute_tax_invoice_move_id",
     )
 
+    def init(self):
+        """ Partial indexes for the few payments waiting to clear tax
+        - Dashboard, count by journal
+        - Import tax invoice, match by payment number or memo """
+        for indexname, definition in PAYMENT_INDEXES.items():
+            self._cr.execute(
+                "SELECT indexname FROM pg_indexes WHERE indexname = %s", (indexname,)
+            )
+            if not self._cr.fetchone():
+                self._cr.execute(
+                    "CREATE INDEX {} ON account_payment {}".format(
+                        indexname, definition
+                    )
+                )
+
+    def _get_missing_tax_invoice_payments(self):
+        """ Return payments with tax invoice not filled in, using one query.
+        Rows of draft moves are all checked, as by posting of the moves """
+        if not self:
+            return self
+        self.env["account.move.tax.invoice"].flush(
+            ["payment_id", "tax_invoice_number", "tax_invoice_date", "move_state"]
+            + ["reversing_id", "reversed_id"]
+        )
+        self._cr.execute(
+            """
+            select distinct payment_id
+            from account_move_tax_invoice
+            where payment_id in %s
+              and (tax_invoice_number is null or tax_invoice_date is null)
+              and ((reversing_id is null and reversed_id is null)
+                or move_state = 'draft')
+        """,
+            (tuple(self.ids),),
+        )
+        return self.browse([row[0] for row in self._cr.fetchall()])
+
     def clear_tax_cash_basis(self):
-        for payment in self:
-            for tax_invoice in payment.tax_invoice_ids:
-                if (
-                    not tax_invoice.tax_invoice_number
-                    or not tax_invoice.tax_invoice_date
-                ):
-                    raise UserError(_("Please fill in tax invoice and tax date"))
-            payment.write({"to_clear_tax": False})
-            moves = payment.tax_invoice_ids.mapped("move_id")
-            for move in moves.filtered(lambda l: l.state == "draft"):
-                move.ensure_one()
-                move.post()
+        if self._get_missing_tax_invoice_payments():
+            raise UserError(_("Please fill in tax invoice and tax date"))
+        moves = self.mapped("tax_invoice_ids.move_id").filtered(
+            lambda l: l.state == "draft"
+        )
+        self.write({"to_clear_tax": False})
+        moves.post()
+        # Posting defers moves with tax invoice not filled in, without error
+        not_posted = moves.filtered(lambda l: l.state != "posted")
+        if not_posted:
+            raise UserError(
+                _("Journal entries %s can not be posted, please check tax invoice")
+                % ", ".join(not_posted.mapped("display_name"))
+            )
         return True
 
+    def _clear_tax_cash_basis_batch(self):
+        """ Clear tax of many payments without stopping at the first error,
+        return {payment: error message} of payments not cleared """
+        missing = self._get_missing_tax_invoice_payments()
+        errors = {
+            payment: _("Please fill in tax invoice and tax date")
+            for payment in missing
+        }
+        payments = self - missing
+        if not payments:
+            return errors
+        self.flush()
+        try:
+            with self._cr.savepoint():
+                payments.clear_tax_cash_basis()
+                self.flush()
+            return errors
+        except (UserError, ValidationError):
+            self.env.clear()
+        # Some payments fail, clear them one by one to find out which ones
+        for payment in payments:
+            try:
+                with self._cr.savepoint():
+                    payment.clear_tax_cash_basis()
+                    self.flush()
+            except (UserError, ValidationError) as e:
+                self.env.clear()
+                errors[payment] = e.name
+        return errors
+
     def _compute_move_id(self):
         for payment in self:
             payment.move_id = payment.move_line_ids.mapped("move_id")[:1]
@@ -0,0 +1,80 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+from odoo import fields, models
+
+from odoo.addons.base.models.ir_sequence import _update_nogap
+
+
+class IrSequence(models.Model):
+    _inherit = "ir.sequence"
+
+    allocate_after_commit = fields.Boolean(
+        string="Number After Commit",
+        help="Used as tax invoice sequence, number is allocated right after "
+        "the posting is committed, in a short transaction. Posting of many "
+        "users at the same time do not wait for each other on this sequence. "
+        "Numbers are without gap only with 'No gap' implementation",
+    )
+
+    def _get_current_sequences(self, sequence_date=None):
+        """ Same as _get_current_sequence() for many sequences,
+        date ranges of all sequences are searched at once.
+        Return {sequence_id: sequence or date range} """
+        sequence_date = sequence_date or fields.Date.today()
+        result = {seq.id: seq for seq in self.filtered(lambda l: not l.use_date_range)}
+        date_seqs = self - self.browse(list(result))
+        if not date_seqs:
+            return result
+        date_ranges = self.env["ir.sequence.date_range"].search(
+            [
+                ("sequence_id", "in", date_seqs.ids),
+                ("date_from", "<=", sequence_date),
+                ("date_to", ">=", sequence_date),
+            ]
+        )
+        for date_range in date_ranges:
+            result.setdefault(date_range.sequence_id.id, date_range)
+        for seq in date_seqs.filtered(lambda l: l.id not in result):
+            result[seq.id] = seq._create_date_range_seq(sequence_date)
+        return result
+
+    def next_block_by_id(self, count, sequence_date=None):
+        """ Draw ``count`` numbers from this sequence in one call, result is
+        the same as calling next_by_id() ``count`` times in a row.
+
+        Numbers are drawn from the database sequence (or the no gap row)
+        directly, so overrides of _next() are not called. Use next_by_id()
+        for sequences numbered by such an override """
+        self.ensure_one()
+        self.check_access_rights("read")
+        if count <= 0:
+            return []
+        if not self.use_date_range:
+            seq = self
+            seq_name = "ir_sequence_%03d" % self.id
+        else:
+            dt = sequence_date or self._context.get(
+                "ir_sequence_date", fields.Date.today()
+            )
+            seq = self.env["ir.sequence.date_range"].search(
+                [
+                    ("sequence_id", "=", self.id),
+                    ("date_from", "<=", dt),
+                    ("date_to", ">=", dt),
+                ],
+                limit=1,
+            )
+            if not seq:
+                seq = self._create_date_range_seq(dt)
+            seq_name = "ir_sequence_%03d_%03d" % (self.id, seq.id)
+            self = self.with_context(ir_sequence_date_range=seq.date_from)
+        if self.implementation == "standard":
+            self._cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)", (seq_name, count)
+            )
+            numbers = sorted(row[0] for row in self._cr.fetchall())
+        else:
+            # Move number_next once by the whole block, row lock is held once
+            number_next = _update_nogap(seq, self.number_increment * count)
+            numbers = [number_next + i * self.number_increment for i in range(count)]
+        return [self.get_next_char(number) for number in numbers]
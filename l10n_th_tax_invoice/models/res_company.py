@@ -0,0 +1,21 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+from odoo import fields, models
+
+
+class ResCompany(models.Model):
+    _inherit = "res.company"
+
+    check_duplicate_tax_invoice = fields.Boolean(
+        string="Check Duplicate Vendor Tax Invoice",
+        help="When posting, do not allow vendor tax invoice number "
+        "already used for the same partner",
+    )
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    check_duplicate_tax_invoice = fields.Boolean(
+        related="company_id.check_duplicate_tax_invoice", readonly=False
+    )
@@ -0,0 +1,130 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import logging
+import time
+
+import psycopg2
+
+from odoo import api, models, sql_db
+
+_logger = logging.getLogger(__name__)
+
+ALLOCATE_RETRIES = 5
+
+
+class TaxInvoiceAllocator(models.AbstractModel):
+    """ Gapless tax invoice numbering for sequences with "Number After Commit".
+
+    Posting a move does not draw its tax invoice number, the tax invoices are
+    only marked as pending. Right after the posting transaction commits, the
+    pending tax invoices are numbered in a separate short transaction, which
+    locks the sequences only for the time needed to write the numbers.
+    Numbers are drawn and written in the same transaction, so a rolled back
+    posting never consumes a number. Numbering is gapless only when the
+    sequence uses "No gap" implementation. Tax invoices that fail to be
+    numbered stay pending, they are retried by the cron job. """
+
+    _name = "tax.invoice.allocator"
+    _description = "Tax Invoice Number Allocator"
+
+    @api.model
+    def _enqueue(self, tax_invoices):
+        """ Mark tax_invoices pending, they are numbered after commit """
+        if not tax_invoices:
+            return
+        tax_invoices.write({"number_pending": True})
+        dbname, uid = self._cr.dbname, self.env.uid
+        company_ids = tax_invoices.mapped("company_id").ids
+        self._cr.after(
+            "commit", lambda: self._allocate_after_commit(dbname, uid, company_ids)
+        )
+
+    @api.model
+    def _allocate_after_commit(self, dbname, uid, company_ids):
+        """ Number pending tax invoices in a new read committed transaction,
+        retried on lock conflicts, leftovers are numbered by the cron job.
+        Companies of the posted tax invoices are allowed, so multi-company
+        record rules do not hide them """
+        for attempt in range(ALLOCATE_RETRIES):
+            try:
+                db = sql_db.db_connect(dbname)
+                with api.Environment.manage(), db.cursor(serialized=False) as cr:
+                    env = api.Environment(cr, uid, {"allowed_company_ids": company_ids})
+                    env["tax.invoice.allocator"]._allocate_pending()
+                return
+            except psycopg2.OperationalError as e:
+                _logger.info("Tax invoice allocation retry %s: %s", attempt + 1, e)
+                time.sleep(0.1 * (attempt + 1))
+            except Exception:
+                _logger.exception("Tax invoice allocation failed")
+                return
+        _logger.warning("Tax invoice allocation postponed to the next cron run")
+
+    @api.model
+    def _lock_sequences(self, sequences):
+        """ Wait for and hold the sequence rows until end of transaction,
+        concurrent allocators of the same sequences are serialized here """
+        if not sequences:
+            return
+        self._cr.execute(
+            "SELECT id FROM ir_sequence WHERE id IN %s ORDER BY id FOR UPDATE",
+            (tuple(sequences.ids),),
+        )
+
+    @api.model
+    def _allocate_pending(self):
+        """ Number all pending tax invoices, return the numbered ones.
+        Each sequence is numbered in its own savepoint, tax invoices of a
+        sequence that fails are logged and stay pending. Only tax invoices
+        of cancelled moves are no longer pending """
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        pending = TaxInvoice.search([("number_pending", "=", True)], order="id")
+        if not pending:
+            return TaxInvoice
+        self._lock_sequences(pending.mapped("tax_line_id.taxinv_sequence_id"))
+        # Other allocator may have numbered them while waiting for the lock
+        pending.invalidate_cache()
+        pending = pending.exists().filtered("number_pending")
+        pending.filtered(lambda l: l.move_id.state == "cancel").write(
+            {"number_pending": False}
+        )
+        posted = pending.filtered(lambda l: l.move_id.state == "posted")
+        groups = {}
+        for tax_invoice in posted:
+            sequence = tax_invoice.tax_line_id.taxinv_sequence_id
+            groups.setdefault(sequence.id, []).append(tax_invoice.id)
+        numbered = TaxInvoice
+        for sequence_id, taxinv_ids in groups.items():
+            tax_invoices = TaxInvoice.browse(taxinv_ids)
+            try:
+                with self.env.cr.savepoint():
+                    self._allocate_tax_invoices(tax_invoices)
+                    self.flush()
+                numbered |= tax_invoices
+            except Exception:
+                self.env.clear()
+                _logger.exception(
+                    "Tax invoice numbering failed, sequence %s, tax invoices %s "
+                    "stay pending",
+                    sequence_id,
+                    taxinv_ids,
+                )
+        return numbered
+
+    @api.model
+    def _allocate_tax_invoices(self, tax_invoices):
+        """ Number tax invoices, reversed entry use origin number,
+        so the origin is numbered first """
+        reversal = tax_invoices.filtered(
+            lambda l: l.move_id.type == "entry" and l.move_id.reversed_entry_id
+        )
+        AccountMove = self.env["account.move"].with_context(tax_invoice_allocating=True)
+        AccountMove._assign_tax_invoice_number(tax_invoices - reversal)
+        AccountMove._assign_tax_invoice_number(reversal)
+        tax_invoices.write({"number_pending": False})
+
+    @api.model
+    def _cron_allocate_pending(self):
+        # Pending tax invoices of all companies of the cron user
+        company_ids = self.env.user.company_ids.ids
+        self.with_context(allowed_company_ids=company_ids)._allocate_pending()
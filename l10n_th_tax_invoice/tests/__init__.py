@@ -1,3 +1,5 @@
 # Copyright 2019 Ecosoft Co., Ltd (http://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 from . import test_tax_invoice
+from . import test_tax_invoice_allocator_benchmark
+from . import test_tax_invoice_index_benchmark
@@ -1,9 +1,37 @@
 # Copyright 2019 Ecosoft Co., Ltd (http://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import base64
+import importlib.util
+from functools import partial
+from types import SimpleNamespace
+
 from odoo import fields
 from odoo.exceptions import UserError
+from odoo.modules.module import get_resource_path
 from odoo.tests.common import SingleTransactionCase
 
+from odoo.addons.l10n_th_tax_invoice.migration_tools import chunked_update
+from odoo.addons.l10n_th_tax_invoice.models.account_move import _dashboard_cache
+
+
+class CommitRecorder(object):
+    """ Cursor wrapper that records statements and commits in order,
+    commit is not run so the test transaction is kept """
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.calls = []
+
+    def execute(self, query, params=None):
+        self.calls.append("execute")
+        return self.cr.execute(query, params)
+
+    def commit(self):
+        self.calls.append("commit")
+
+    def __getattr__(self, name):
+        return getattr(self.cr, name)
+
 
 class TestTaxInvoice(SingleTransactionCase):
     @classmethod
@@ -372,6 +400,62 @@ class TestTaxInvoice(SingleTransactionCase):
         payment.action_draft()  # Unlink the relation
         self.assertFalse(payment.move_line_ids)
 
+    def test_tax_invoice_payment_id(self):
+        """ Tax invoice of cash basis entry gets its payment from context,
+        tax invoice of its reversal gets the payment of the origin """
+        invoice = self.customer_invoice_undue_vat.copy()
+        invoice.action_post()
+        payment = self.env["account.payment"].create(
+            {
+                "payment_date": fields.Date.today(),
+                "payment_type": "inbound",
+                "amount": 107.00,
+                "journal_id": self.journal_bank.id,
+                "partner_type": "customer",
+                "partner_id": self.env.ref("base.res_partner_10").id,
+                "payment_method_id": self.payment_method_manual_out.id,
+                "invoice_ids": [(4, invoice.id, None)],
+            }
+        )
+        payment.post()
+        cash_basis_move = payment.tax_invoice_move_id
+        self.assertTrue(cash_basis_move)
+        self.assertEqual(cash_basis_move.tax_invoice_ids.mapped("payment_id"), payment)
+        # Origin tax invoices and reversal are created in the same transaction
+        reversal = cash_basis_move._reverse_moves(
+            [{"date": fields.Date.today(), "ref": "Reversal"}]
+        )
+        self.assertTrue(reversal.tax_invoice_ids)
+        self.assertEqual(reversal.tax_invoice_ids.mapped("payment_id"), payment)
+        # No origin, payment from context
+        move = (
+            self.env["account.move"]
+            .with_context(payment_id=payment.id)
+            .create(
+                {
+                    "type": "entry",
+                    "journal_id": self.journal_undue.id,
+                    "line_ids": [
+                        (
+                            0,
+                            0,
+                            {
+                                "account_id": self.output_vat_acct.id,
+                                "credit": 7.0,
+                                "tax_line_id": self.output_vat.id,
+                            },
+                        ),
+                        (
+                            0,
+                            0,
+                            {"account_id": self.undue_output_vat_acct.id, "debit": 7.0},
+                        ),
+                    ],
+                }
+            )
+        )
+        self.assertEqual(move.tax_invoice_ids.payment_id, payment)
+
     def test_supplier_invoice_refund_reconcile(self):
         """ Case on undue vat, to net refund with vendor bill.
         In this case, cash basis journal entry will be created, make sure it
@@ -396,3 +480,501 @@ class TestTaxInvoice(SingleTransactionCase):
         # After tax invoice is filled, can now posted
         cash_basis_entry.action_post()
         self.assertEqual(cash_basis_entry.state, "posted")
+
+    def test_create_manual_tax_invoice_multi_lines(self):
+        """ Create many journal items at once, each manual tax line
+        should get its own tax invoice from a single batch """
+        move = self.env["account.move"].create(
+            {
+                "type": "entry",
+                "journal_id": self.journal_undue.id,
+                "line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "account_id": self.input_vat_acct.id,
+                            "debit": 7.0,
+                            "manual_tax_invoice": True,
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "account_id": self.input_vat_acct.id,
+                            "debit": 14.0,
+                            "manual_tax_invoice": True,
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {"account_id": self.undue_input_vat_acct.id, "credit": 21.0},
+                    ),
+                ],
+            }
+        )
+        manual_lines = move.line_ids.filtered("manual_tax_invoice")
+        self.assertEqual(len(manual_lines), 2)
+        for line in manual_lines:
+            self.assertEqual(len(line.tax_invoice_ids), 1)
+            self.assertEqual(line.tax_invoice_ids.balance, line.balance)
+        self.assertEqual(len(move.tax_invoice_ids), 2)
+
+    def test_invalid_tax_amount_multi_lines(self):
+        """ All lines with tax amount not matching their tax invoices
+        are reported together in one error """
+        line_vals = [
+            (
+                0,
+                0,
+                {
+                    "name": "VAT line {}".format(i),
+                    "account_id": self.input_vat_acct.id,
+                    "debit": 7.0 * i,
+                    "tax_line_id": self.input_vat.id,
+                },
+            )
+            for i in range(1, 4)
+        ]
+        line_vals.append(
+            (0, 0, {"account_id": self.undue_input_vat_acct.id, "credit": 42.0})
+        )
+        move = self.env["account.move"].create(
+            {
+                "type": "entry",
+                "journal_id": self.journal_undue.id,
+                "line_ids": line_vals,
+            }
+        )
+        move.tax_invoice_ids.write(
+            {
+                "tax_invoice_number": "SINV-50001",
+                "tax_invoice_date": fields.Date.today(),
+            }
+        )
+        bad_lines = move.line_ids.filtered(
+            lambda l: l.name in ("VAT line 1", "VAT line 2")
+        )
+        bad_lines.mapped("tax_invoice_ids").write({"balance": 1.0})
+        with self.assertRaises(UserError) as e:
+            with self.env.cr.savepoint():
+                move.action_post()
+        message = e.exception.name
+        self.assertTrue(message.startswith("Invalid Tax Amount"))
+        self.assertIn("VAT line 1", message)
+        self.assertIn("VAT line 2", message)
+        self.assertNotIn("VAT line 3", message)
+
+    def test_customer_invoice_vat_sequence_multi(self):
+        """ Post many customer invoices at once,
+        tax invoice numbers are drawn by block in posting order """
+        sequence = self.env["ir.sequence"].create(
+            {"name": "Cust VAT Block Sequence", "prefix": "BTX", "padding": 4}
+        )
+        self.output_vat.taxinv_sequence_id = sequence
+        invoices = self.customer_invoice_vat.copy()
+        invoices |= self.customer_invoice_vat.copy()
+        invoices |= self.customer_invoice_vat.copy()
+        invoices.action_post()
+        numbers = [inv.tax_invoice_ids.tax_invoice_number for inv in invoices]
+        self.assertEqual(numbers, ["BTX0001", "BTX0002", "BTX0003"])
+        self.assertEqual(sequence.next_block_by_id(2), ["BTX0004", "BTX0005"])
+        self.output_vat.taxinv_sequence_id = self.cust_vat_sequence
+
+    def test_customer_invoice_vat_sequence_date_range(self):
+        """ Invoices of different dates in the same date range of
+        the sequence are numbered from one block """
+        sequence = self.env["ir.sequence"].create(
+            {
+                "name": "Cust VAT Date Range Sequence",
+                "prefix": "DTX%(range_year)s-",
+                "padding": 4,
+                "use_date_range": True,
+            }
+        )
+        self.output_vat.taxinv_sequence_id = sequence
+        invoices = self.env["account.move"]
+        for invoice_date in ["2020-01-15", "2020-02-15", "2021-01-15"]:
+            invoices |= self.customer_invoice_vat.copy(
+                {"invoice_date": invoice_date, "date": invoice_date}
+            )
+        invoices.action_post()
+        numbers = [inv.tax_invoice_ids.tax_invoice_number for inv in invoices]
+        self.assertEqual(numbers, ["DTX2020-0001", "DTX2020-0002", "DTX2021-0001"])
+        self.assertEqual(len(sequence.date_range_ids), 2)
+        self.output_vat.taxinv_sequence_id = self.cust_vat_sequence
+
+    def test_tax_invoice_report_index(self):
+        """ Summary refresh and dashboard are served by a partial index
+        on report_date, see the benchmark for query plans """
+        self.env.cr.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = %s",
+            ("account_move_tax_invoice_report_date_idx",),
+        )
+        indexdef = self.env.cr.fetchone()[0]
+        self.assertIn("(company_id, report_date)", indexdef)
+        self.assertIn("reversed_id IS NULL", indexdef)
+
+    def test_change_report_month(self):
+        """ Change report month of many tax invoices at once with SQL,
+        report_date must be the same as computed by ORM """
+        invoice = self.supplier_invoice_vat.copy()
+        tax_invoices = invoice.tax_invoice_ids
+        tax_invoices.write({"tax_invoice_date": "2020-01-31"})
+        self.assertEqual(str(tax_invoices[0].report_date), "2020-01-31")
+        wizard = (
+            self.env["tax.invoice.report.month"]
+            .with_context(active_ids=tax_invoices.ids)
+            .create({"report_late_mo": "1"})
+        )
+        wizard.action_change_report_month()
+        self.assertEqual(tax_invoices[0].report_late_mo, "1")
+        self.assertEqual(str(tax_invoices[0].report_date), "2020-02-29")
+        # ORM compute gives the same result
+        tax_invoices._compute_report_date()
+        self.assertEqual(str(tax_invoices[0].report_date), "2020-02-29")
+
+    def test_duplicate_tax_invoice(self):
+        """ With company option, vendor tax invoice number can not be used twice
+        for the same partner, compared as normalized number """
+        invoice1 = self.supplier_invoice_vat.copy()
+        invoice2 = self.supplier_invoice_vat.copy()
+        tax_date = fields.Date.today()
+        invoice1.tax_invoice_ids.write(
+            {"tax_invoice_number": "DUP-0001", "tax_invoice_date": tax_date}
+        )
+        invoice2.tax_invoice_ids.write(
+            {"tax_invoice_number": "dup 0001", "tax_invoice_date": tax_date}
+        )
+        self.assertEqual(invoice2.tax_invoice_ids.tax_invoice_number_norm, "DUP0001")
+        invoice1.action_post()
+        invoice1.company_id.check_duplicate_tax_invoice = True
+        with self.assertRaises(UserError):
+            invoice2.action_post()
+        invoice1.company_id.check_duplicate_tax_invoice = False
+        invoice2.action_post()
+        action = self.env["account.move.tax.invoice"].action_view_duplicate()
+        duplicates = self.env["account.move.tax.invoice"].search(action["domain"])
+        self.assertIn(invoice1.tax_invoice_ids, duplicates)
+        self.assertIn(invoice2.tax_invoice_ids, duplicates)
+
+    def test_clear_tax_cash_basis_multi(self):
+        """ Clear tax of many payments, payments not ready are reported """
+        payments = self.env["account.payment"]
+        for _i in range(3):
+            invoice = self.supplier_invoice_undue_vat.copy()
+            invoice.action_post()
+            payment = self.env["account.payment"].create(
+                {
+                    "payment_date": fields.Date.today(),
+                    "payment_type": "outbound",
+                    "amount": 107.00,
+                    "journal_id": self.journal_bank.id,
+                    "partner_type": "supplier",
+                    "partner_id": self.env.ref("base.res_partner_12").id,
+                    "payment_method_id": self.payment_method_manual_out.id,
+                    "invoice_ids": [(4, invoice.id, None)],
+                }
+            )
+            payment.post()
+            payments |= payment
+        self.assertTrue(all(payments.mapped("to_clear_tax")))
+        (payments[0] | payments[2]).mapped("tax_invoice_ids").write(
+            {"tax_invoice_number": "SINV-20001", "tax_invoice_date": "2020-01-01"}
+        )
+        # Reversed row of the draft move is checked too, as it is by posting
+        tax_invoice = payments[2].tax_invoice_ids
+        tax_invoice.copy(
+            {
+                "payment_id": payments[2].id,
+                "reversed_id": tax_invoice.move_id.id,
+                "tax_invoice_number": False,
+                "tax_invoice_date": False,
+            }
+        )
+        wizard = (
+            self.env["clear.tax.cash.basis"]
+            .with_context(active_ids=payments.ids)
+            .create({})
+        )
+        self.assertEqual(wizard.payment_ids, payments)
+        wizard.action_clear_tax()
+        self.assertIn("1 payment(s) cleared, 2 payment(s) failed", wizard.result)
+        self.assertFalse(payments[0].to_clear_tax)
+        self.assertEqual(payments[0].tax_invoice_move_id.state, "posted")
+        for payment in payments[1:]:
+            self.assertTrue(payment.to_clear_tax)
+            self.assertEqual(payment.tax_invoice_move_id.state, "draft")
+
+    def test_import_tax_invoice(self):
+        """ Import vendor tax invoice number and date from CSV,
+        deferred journal entry of payment is posted, bad rows are rejected """
+        partner = self.env.ref("base.res_partner_12")
+        payments = self.env["account.payment"]
+        for _i in range(3):
+            invoice = self.supplier_invoice_undue_vat.copy()
+            invoice.action_post()
+            payment = self.env["account.payment"].create(
+                {
+                    "payment_date": fields.Date.today(),
+                    "payment_type": "outbound",
+                    "amount": 107.00,
+                    "journal_id": self.journal_bank.id,
+                    "partner_type": "supplier",
+                    "partner_id": partner.id,
+                    "payment_method_id": self.payment_method_manual_out.id,
+                    "invoice_ids": [(4, invoice.id, None)],
+                }
+            )
+            payment.post()
+            self.assertTrue(payment.to_clear_tax)
+            payments |= payment
+        payment, payment_invalid = payments
+        # Tax amount is wrong, number is imported but payment is not cleared
+        payment_invalid.tax_invoice_ids.write({"balance": 6.0})
+        data = "\n".join(
+            [
+                "reference,partner,tax_invoice_number,tax_invoice_date",
+                "{},{},SINV-30001,2020-01-15".format(payment.name, partner.name),
+                "NO-SUCH-REF,{},SINV-30002,2020-01-15".format(partner.name),
+                "{},{},SINV-30003,not a date".format(payment.name, partner.name),
+                "/,{},SINV-30004,2020-01-15".format(partner.name),
+                "{},{},SINV-30005,2020-01-15".format(
+                    payment_invalid.name, partner.name
+                ),
+            ]
+        )
+        wizard = self.env["tax.invoice.import"].create(
+            {"data_file": base64.b64encode(data.encode()), "filename": "taxinv.csv"}
+        )
+        wizard.action_import()
+        self.assertEqual(
+            wizard.result, "2 row(s) imported, 3 rejected, 1 payment(s) not cleared"
+        )
+        reject_rows = base64.b64decode(wizard.reject_file).decode().splitlines()
+        self.assertEqual(
+            [row.split(",")[0] for row in reject_rows], ["line", "4", "3", "5", "6"]
+        )
+        tax_invoice = payment.tax_invoice_ids
+        self.assertEqual(tax_invoice.tax_invoice_number, "SINV-30001")
+        self.assertEqual(str(tax_invoice.tax_invoice_date), "2020-01-15")
+        # Computed fields are updated by the bulk update
+        self.assertEqual(tax_invoice.tax_invoice_number_norm, "SINV30001")
+        self.assertEqual(str(tax_invoice.report_date), "2020-01-31")
+        self.assertFalse(payment.to_clear_tax)
+        self.assertEqual(payment.tax_invoice_move_id.state, "posted")
+        tax_invoice = payment_invalid.tax_invoice_ids
+        self.assertEqual(tax_invoice.tax_invoice_number, "SINV-30005")
+        self.assertTrue(payment_invalid.to_clear_tax)
+
+    def test_tax_invoice_allocator(self):
+        """ With Number After Commit, number is not drawn on posting,
+        it is allocated later in posting order without gap """
+        origin_sequence = self.output_vat.taxinv_sequence_id
+        sequence = self.env["ir.sequence"].create(
+            {
+                "name": "Cust VAT Allocated Sequence",
+                "prefix": "ATX",
+                "padding": 4,
+                "implementation": "no_gap",
+                "allocate_after_commit": True,
+            }
+        )
+        self.output_vat.taxinv_sequence_id = sequence
+        invoices = self.customer_invoice_vat.copy()
+        invoices |= self.customer_invoice_vat.copy()
+        invoices.action_post()
+        tax_invoices = invoices.mapped("tax_invoice_ids")
+        self.assertTrue(all(tax_invoices.mapped("number_pending")))
+        self.assertFalse(any(tax_invoices.mapped("tax_invoice_number")))
+        self.env["tax.invoice.allocator"]._allocate_pending()
+        numbers = [inv.tax_invoice_ids.tax_invoice_number for inv in invoices]
+        self.assertEqual(numbers, ["ATX0001", "ATX0002"])
+        self.assertFalse(any(tax_invoices.mapped("number_pending")))
+        self.output_vat.taxinv_sequence_id = origin_sequence
+
+    def test_tax_invoice_allocator_failure(self):
+        """ Sequence that fails to number does not stop other sequences,
+        its tax invoices stay pending to be retried. Tax invoices without
+        sequence anymore are numbered by document number """
+        origin_sequence = self.output_vat.taxinv_sequence_id
+        sequence_vals = {
+            "padding": 4,
+            "implementation": "no_gap",
+            "allocate_after_commit": True,
+        }
+        sequence = self.env["ir.sequence"].create(
+            dict(sequence_vals, name="Cust VAT Allocated OK", prefix="OTX")
+        )
+        bad_sequence = self.env["ir.sequence"].create(
+            dict(sequence_vals, name="Cust VAT Allocated Bad", prefix="%(bad)s")
+        )
+        # Sequence removed from tax after posting
+        self.output_vat.taxinv_sequence_id = sequence
+        no_sequence_invoice = self.customer_invoice_vat.copy()
+        no_sequence_invoice.action_post()
+        self.output_vat.taxinv_sequence_id = False
+        self.env["tax.invoice.allocator"]._allocate_pending()
+        tax_invoice = no_sequence_invoice.tax_invoice_ids
+        self.assertEqual(tax_invoice.tax_invoice_number, no_sequence_invoice.name)
+        self.assertFalse(tax_invoice.number_pending)
+        # Bad sequence fails, good one is still numbered
+        bad_vat = self.output_vat.copy({"taxinv_sequence_id": bad_sequence.id})
+        revenue = self.env.ref("account.data_account_type_revenue")
+        bad_invoice = self.env["account.move"].create(
+            {
+                "partner_id": self.env.ref("base.res_partner_10").id,
+                "journal_id": self.journal_sale.id,
+                "type": "out_invoice",
+                "invoice_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "quantity": 1.0,
+                            "account_id": self.env["account.account"]
+                            .search([("user_type_id", "=", revenue.id)], limit=1)
+                            .id,
+                            "name": "Advice",
+                            "price_unit": 100.00,
+                            "tax_ids": [(6, 0, [bad_vat.id])],
+                        },
+                    )
+                ],
+            }
+        )
+        bad_invoice.action_post()
+        self.output_vat.taxinv_sequence_id = sequence
+        invoice = self.customer_invoice_vat.copy()
+        invoice.action_post()
+        numbered = self.env["tax.invoice.allocator"]._allocate_pending()
+        self.assertEqual(numbered, invoice.tax_invoice_ids)
+        self.assertEqual(invoice.tax_invoice_ids.tax_invoice_number, "OTX0001")
+        self.assertFalse(bad_invoice.tax_invoice_ids.tax_invoice_number)
+        self.assertTrue(bad_invoice.tax_invoice_ids.number_pending)
+        # Retried once the sequence is fixed, no number is lost
+        bad_sequence.prefix = "BTX"
+        numbered = self.env["tax.invoice.allocator"]._allocate_pending()
+        self.assertEqual(numbered, bad_invoice.tax_invoice_ids)
+        self.assertEqual(bad_invoice.tax_invoice_ids.tax_invoice_number, "BTX0001")
+        self.assertFalse(bad_invoice.tax_invoice_ids.number_pending)
+        self.output_vat.taxinv_sequence_id = origin_sequence
+
+    def test_tax_invoice_allocator_cancel(self):
+        """ Pending tax invoices of cancelled moves are no longer pending,
+        the ones of moves reset to draft wait for the next posting """
+        origin_sequence = self.output_vat.taxinv_sequence_id
+        sequence = self.env["ir.sequence"].create(
+            {
+                "name": "Cust VAT Allocated Cancel",
+                "prefix": "CTX",
+                "padding": 4,
+                "implementation": "no_gap",
+                "allocate_after_commit": True,
+            }
+        )
+        self.output_vat.taxinv_sequence_id = sequence
+        cancelled = self.customer_invoice_vat.copy()
+        draft = self.customer_invoice_vat.copy()
+        (cancelled | draft).action_post()
+        (cancelled | draft).button_draft()
+        cancelled.button_cancel()
+        self.env["tax.invoice.allocator"]._allocate_pending()
+        self.assertFalse(cancelled.tax_invoice_ids.number_pending)
+        self.assertFalse(cancelled.tax_invoice_ids.tax_invoice_number)
+        self.assertTrue(draft.tax_invoice_ids.number_pending)
+        draft.action_post()
+        self.env["tax.invoice.allocator"]._allocate_pending()
+        self.assertEqual(draft.tax_invoice_ids.tax_invoice_number, "CTX0001")
+        self.output_vat.taxinv_sequence_id = origin_sequence
+
+    def test_migration_chunked_update(self):
+        """ Backfill by id range batches give the same result as one update """
+        tax_invoices = self.env["account.move.tax.invoice"].search(
+            [("move_line_id.partner_id", "!=", False)]
+        )
+        tax_invoices = tax_invoices.filtered(
+            lambda l: l.partner_id == l.move_line_id.partner_id
+        )
+        tax_invoices.flush()
+        self.env.cr.execute(
+            "update account_move_tax_invoice set partner_id = null where id in %s",
+            (tuple(tax_invoices.ids),),
+        )
+        updated = chunked_update(
+            self.env.cr,
+            "account_move_tax_invoice",
+            "partner_id = ml.partner_id",
+            from_clause="account_move_line ml",
+            where_clause="ml.id = t.move_line_id AND t.partner_id IS NULL",
+            batch_size=2,
+        )
+        self.assertGreaterEqual(updated, len(tax_invoices))
+        tax_invoices.invalidate_cache()
+        for tax_invoice in tax_invoices:
+            partner = tax_invoice.move_line_id.partner_id
+            self.assertEqual(tax_invoice.partner_id, partner)
+
+    def test_migration_commit_by_batch(self):
+        """ Partner backfill of 13.0.2.0.0 commits after each batch,
+        so row locks of a batch are released before the next one """
+        path = get_resource_path(
+            "l10n_th_tax_invoice", "migrations", "13.0.2.0.0", "post-migration.py"
+        )
+        spec = importlib.util.spec_from_file_location("post_migration", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        migration.chunked_update = partial(chunked_update, batch_size=2)
+        self.env["account.move.tax.invoice"].flush()
+        cr = CommitRecorder(self.env.cr)
+        migration._auto_update_field_partner_id(SimpleNamespace(cr=cr))
+        # Select of the id range, then each batch update is committed
+        self.assertEqual(cr.calls[0], "execute")
+        batches = cr.calls[1:]
+        self.assertTrue(batches)
+        self.assertEqual(batches, ["execute", "commit"] * (len(batches) // 2))
+
+    def test_dashboard_stats(self):
+        """ Dashboard aggregates are read by SQL and cached for a short time """
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        stats = TaxInvoice.get_dashboard_stats()
+        self.assertEqual(set(stats), {"unfilled", "to_clear_tax", "vat_by_month"})
+        # New vendor bill without tax invoice number, not seen until cache expires
+        invoice = self.supplier_invoice_vat.copy()
+        invoice.tax_invoice_ids.flush()
+        self.assertEqual(TaxInvoice.get_dashboard_stats(), stats)
+        _dashboard_cache.clear()
+        new_stats = TaxInvoice.get_dashboard_stats()
+        self.assertEqual(new_stats["unfilled"]["count"], stats["unfilled"]["count"] + 1)
+
+    def test_dashboard_vat_by_month(self):
+        """ Monthly VAT counts valid tax invoices only, both sales and purchase
+        VAT as positive amount, same as tax report """
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        today = fields.Date.today()
+        month = fields.Date.to_string(today.replace(day=1))
+
+        def vat_of_month():
+            _dashboard_cache.clear()
+            vat_by_month = TaxInvoice.get_dashboard_stats()["vat_by_month"]
+            vat = [vals for vals in vat_by_month if vals["month"] == month]
+            return vat and (vat[0]["sale"], vat[0]["purchase"]) or (0.0, 0.0)
+
+        sale, purchase = vat_of_month()
+        customer_invoice = self.customer_invoice_vat.copy()
+        customer_invoice.action_post()
+        supplier_invoice = self.supplier_invoice_vat.copy()
+        supplier_invoice.tax_invoice_ids.write(
+            {"tax_invoice_number": "SINV-40001", "tax_invoice_date": today}
+        )
+        supplier_invoice.action_post()
+        self.assertEqual(vat_of_month(), (sale + 7.0, purchase + 7.0))
+        # Cancelled invoice is not counted
+        cancelled_invoice = self.customer_invoice_vat.copy()
+        cancelled_invoice.action_post()
+        self.assertEqual(vat_of_month(), (sale + 14.0, purchase + 7.0))
+        cancelled_invoice.button_draft()
+        cancelled_invoice.button_cancel()
+        self.assertEqual(vat_of_month(), (sale + 7.0, purchase + 7.0))
@@ -0,0 +1,178 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from odoo import SUPERUSER_ID, api, sql_db
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+WORKERS = 20
+POSTING_TIME = 0.05
+POSTING_RETRIES = 10
+
+
+@tagged("-standard", "benchmark")
+class TestTaxInvoiceAllocatorBenchmark(TransactionCase):
+    """ Run with --test-tags=benchmark
+
+    WORKERS users post one customer invoice each at the same time, all taxed
+    by the same no gap tax invoice sequence. Rest of each posting transaction
+    takes POSTING_TIME. Workers use their own cursors, as test cursor can not
+    run in parallel, so test data is committed and removed on tearDown.
+    Postings numbered in transaction are rolled back. """
+
+    def setUp(self):
+        super().setUp()
+        self.db = sql_db.db_connect(self.env.cr.dbname)
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            sequence = env["ir.sequence"].create(
+                {
+                    "name": "Benchmark Tax Invoice",
+                    "implementation": "no_gap",
+                    "padding": 6,
+                }
+            )
+            account = env["account.account"].create(
+                {
+                    "name": "Benchmark VAT",
+                    "code": "BENCHVAT",
+                    "user_type_id": env.ref(
+                        "account.data_account_type_current_liabilities"
+                    ).id,
+                }
+            )
+            tax = env["account.tax"].create(
+                {
+                    "name": "Benchmark VAT",
+                    "type_tax_use": "sale",
+                    "amount_type": "percent",
+                    "amount": 7.0,
+                    "tax_exigibility": "on_invoice",
+                    "taxinv_sequence_id": sequence.id,
+                    "invoice_repartition_line_ids": [
+                        (0, 0, {"factor_percent": 100.0, "repartition_type": "base"}),
+                        (
+                            0,
+                            0,
+                            {
+                                "factor_percent": 100.0,
+                                "repartition_type": "tax",
+                                "account_id": account.id,
+                            },
+                        ),
+                    ],
+                }
+            )
+            journal = env["account.journal"].search([("type", "=", "sale")], limit=1)
+            revenue = env["account.account"].search(
+                [("user_type_id.internal_group", "=", "income")], limit=1
+            )
+            invoices = env["account.move"].create(
+                [
+                    {
+                        "partner_id": env.ref("base.res_partner_12").id,
+                        "journal_id": journal.id,
+                        "type": "out_invoice",
+                        "invoice_line_ids": [
+                            (
+                                0,
+                                0,
+                                {
+                                    "account_id": revenue.id,
+                                    "name": "Benchmark",
+                                    "quantity": 1.0,
+                                    "price_unit": 100.0,
+                                    "tax_ids": [(6, 0, [tax.id])],
+                                },
+                            )
+                        ],
+                    }
+                    for _i in range(2 * WORKERS)
+                ]
+            )
+            self.sequence_id = sequence.id
+            self.account_id = account.id
+            self.tax_id = tax.id
+            self.invoice_ids = invoices.ids
+
+    def tearDown(self):
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            invoices = env["account.move"].browse(self.invoice_ids)
+            invoices.filtered(lambda l: l.state == "posted").button_draft()
+            invoices.with_context(force_delete=True).unlink()
+            env["account.tax"].browse(self.tax_id).unlink()
+            env["account.account"].browse(self.account_id).unlink()
+            env["ir.sequence"].browse(self.sequence_id).unlink()
+        super().tearDown()
+
+    def _set_allocate_after_commit(self, allocate_after_commit):
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            sequence = env["ir.sequence"].browse(self.sequence_id)
+            sequence.allocate_after_commit = allocate_after_commit
+
+    def _post_number_in_transaction(self, invoice_id):
+        """ Number is drawn while posting, sequence is locked until the end
+        of the transaction. Concurrent postings fail on the no gap sequence
+        lock and are retried, as by the server """
+        for attempt in range(POSTING_RETRIES):
+            try:
+                with api.Environment.manage(), self.db.cursor(
+                    serialized=False
+                ) as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    invoice = env["account.move"].browse(invoice_id)
+                    invoice.action_post()
+                    number = invoice.tax_invoice_ids.tax_invoice_number
+                    time.sleep(POSTING_TIME)  # rest of posting
+                    cr.rollback()
+                return number
+            except psycopg2.OperationalError:
+                time.sleep(0.01 * (attempt + 1))
+        raise AssertionError("Posting failed after %s retries" % POSTING_RETRIES)
+
+    def _post_number_after_commit(self, invoice_id):
+        """ Posting commits first, number is drawn right after the commit
+        by the allocator, in a short transaction """
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env["account.move"].browse(invoice_id).action_post()
+            time.sleep(POSTING_TIME)  # rest of posting
+
+    def _run(self, post, invoice_ids):
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            results = list(executor.map(post, invoice_ids))
+        elapsed = time.time() - start
+        _logger.info("%s parallel postings, %s: %.3fs", WORKERS, post.__name__, elapsed)
+        return results, elapsed
+
+    def _read_numbers(self, invoice_ids):
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            invoices = env["account.move"].browse(invoice_ids)
+            return sorted(invoices.mapped("tax_invoice_ids.tax_invoice_number"))
+
+    def test_allocate_after_commit(self):
+        expected = ["%06d" % i for i in range(1, WORKERS + 1)]
+        self._set_allocate_after_commit(False)
+        numbers, in_transaction = self._run(
+            self._post_number_in_transaction, self.invoice_ids[:WORKERS]
+        )
+        # Each posting was rolled back, so they all got the same first number
+        self.assertEqual(set(numbers), {expected[0]})
+        self._set_allocate_after_commit(True)
+        _results, after_commit = self._run(
+            self._post_number_after_commit, self.invoice_ids[WORKERS:]
+        )
+        self.assertEqual(self._read_numbers(self.invoice_ids[WORKERS:]), expected)
+        # Postings wait for each other only while drawing the number
+        self.assertLess(after_commit, in_transaction)
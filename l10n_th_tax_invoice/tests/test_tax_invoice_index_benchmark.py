@@ -0,0 +1,92 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import json
+import logging
+
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+ROWS = 200000
+INDEX_NAME = "account_move_tax_invoice_report_date_idx"
+# Tax report summary refresh and dashboard VAT by month, by company and
+# report_date, on valid tax invoices only
+QUERIES = {
+    "summary refresh": """
+        select t.id from account_move_tax_invoice t
+        where t.company_id = %(company_id)s and t.report_date = %(date)s
+          and t.tax_invoice_number is not null and t.reversed_id is null
+    """,
+    "dashboard": """
+        select date_trunc('month', t.report_date), sum(t.balance)
+        from account_move_tax_invoice t
+        where t.company_id in %(company_ids)s and t.report_date >= %(date_from)s
+          and t.tax_invoice_number is not null and t.reversed_id is null
+          and t.reversing_id is null
+        group by 1
+    """,
+}
+
+
+@tagged("-standard", "benchmark")
+class TestTaxInvoiceIndexBenchmark(TransactionCase):
+    """ Run with --test-tags=benchmark
+
+    ROWS tax invoices over 10 years are generated in the test transaction,
+    query plans are compared with and without the partial index """
+
+    def setUp(self):
+        super().setUp()
+        self.company = self.env.company
+        self.env["account.move.tax.invoice"].flush()
+        self.env.cr.execute(
+            """
+            insert into account_move_tax_invoice (
+                company_id, report_late_mo, report_date, tax_invoice_number,
+                tax_invoice_date, balance, reversed_id)
+            select %s, '0', date '2011-01-31' + (i %% 3650),
+                'BENCH' || i, date '2011-01-01' + (i %% 3650), 7.0,
+                case when i %% 10 = 0 then (select min(id) from account_move)
+                end
+            from generate_series(1, %s) i
+        """,
+            (self.company.id, ROWS),
+        )
+        self.env.cr.execute("analyze account_move_tax_invoice")
+
+    def _explain(self, query):
+        params = {
+            "company_id": self.company.id,
+            "company_ids": (self.company.id,),
+            "date": "2020-06-30",
+            "date_from": "2020-11-01",
+        }
+        self.env.cr.execute("explain (analyze, format json) " + query, params)
+        plan = self.env.cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]
+
+    def _disable_index_scan(self):
+        self.env.cr.execute("set local enable_indexscan = off")
+        self.env.cr.execute("set local enable_bitmapscan = off")
+        self.env.cr.execute("set local enable_indexonlyscan = off")
+
+    def test_report_date_index_plan(self):
+        with_index = {}
+        for name, query in QUERIES.items():
+            plan = self._explain(query)
+            self.assertIn(INDEX_NAME, json.dumps(plan["Plan"]), name)
+            with_index[name] = plan["Execution Time"]
+        self._disable_index_scan()
+        for name, query in QUERIES.items():
+            without_index = self._explain(query)["Execution Time"]
+            _logger.info(
+                "%s on %s tax invoices: %.2fms with index, %.2fms without",
+                name,
+                ROWS,
+                with_index[name],
+                without_index,
+            )
+            self.assertLess(with_index[name], without_index, name)
@@ -0,0 +1,5 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+from . import clear_tax_cash_basis
+from . import tax_invoice_import
+from . import tax_invoice_report_month
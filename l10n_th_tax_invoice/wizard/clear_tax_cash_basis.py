@@ -0,0 +1,46 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+from odoo import _, api, fields, models
+
+
+class ClearTaxCashBasis(models.TransientModel):
+    _name = "clear.tax.cash.basis"
+    _description = "Clear Tax of Many Payments"
+
+    payment_ids = fields.Many2many(
+        comodel_name="account.payment",
+        string="Payments",
+        default=lambda self: self._default_payment_ids(),
+    )
+    state = fields.Selection(
+        [("draft", "Draft"), ("done", "Done")], default="draft", readonly=True
+    )
+    result = fields.Text(readonly=True)
+
+    @api.model
+    def _default_payment_ids(self):
+        return (
+            self.env["account.payment"]
+            .browse(self._context.get("active_ids", []))
+            .filtered(lambda l: l.to_clear_tax and l.state == "posted")
+        )
+
+    def action_clear_tax(self):
+        self.ensure_one()
+        errors = self.payment_ids._clear_tax_cash_basis_batch()
+        lines = [
+            _("%s payment(s) cleared, %s payment(s) failed")
+            % (len(self.payment_ids) - len(errors), len(errors))
+        ]
+        lines += [
+            "{}: {}".format(payment.display_name, error)
+            for payment, error in errors.items()
+        ]
+        self.write({"state": "done", "result": "\n".join(lines)})
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
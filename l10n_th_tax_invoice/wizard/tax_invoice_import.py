@@ -0,0 +1,256 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+import base64
+import csv
+import datetime
+import io
+import logging
+import tempfile
+from itertools import islice
+
+from odoo import _, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_COLUMNS = ["reference", "partner", "tax_invoice_number", "tax_invoice_date"]
+
+
+class TaxInvoiceImport(models.TransientModel):
+    _name = "tax.invoice.import"
+    _description = "Import Vendor Tax Invoice Number and Date"
+
+    data_file = fields.Binary(string="File", required=True)
+    filename = fields.Char()
+    clear_tax = fields.Boolean(
+        string="Clear Tax",
+        default=True,
+        help="After import, post the deferred journal entries of payments",
+    )
+    state = fields.Selection(
+        [("draft", "Draft"), ("done", "Done")], default="draft", readonly=True
+    )
+    result = fields.Text(readonly=True)
+    reject_file = fields.Binary(readonly=True)
+    reject_filename = fields.Char(readonly=True)
+
+    def _open_data_file(self):
+        """ Return the uploaded file opened in binary mode. It is read from
+        its attachment in the filestore, not base64 decoded in memory """
+        attachment = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_field", "=", "data_file"),
+                    ("res_id", "=", self.id),
+                ],
+                limit=1,
+            )
+        )
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), "rb")
+        if attachment.db_datas:
+            return io.BytesIO(attachment.db_datas)
+        return io.BytesIO(base64.b64decode(self.data_file))
+
+    def _iter_csv_rows(self, data_file):
+        reader = csv.reader(
+            io.TextIOWrapper(data_file, encoding="utf-8-sig", newline="")
+        )
+        for row in reader:
+            yield row
+
+    def _iter_xlsx_rows(self, data_file):
+        try:
+            import openpyxl
+        except ImportError:
+            raise UserError(_("Python library openpyxl is required to import XLSX"))
+        workbook = openpyxl.load_workbook(data_file, read_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield ["" if value is None else value for value in row]
+        finally:
+            workbook.close()
+
+    def _iter_rows(self):
+        """ Yield (line, [reference, partner, number, date]) of data rows,
+        rows are read from the file as they are consumed """
+        with self._open_data_file() as data_file:
+            if (self.filename or "").lower().endswith(".xlsx"):
+                rows = self._iter_xlsx_rows(data_file)
+            else:
+                rows = self._iter_csv_rows(data_file)
+            header = [str(col).strip().lower() for col in next(rows, [])]
+            missing = [col for col in IMPORT_COLUMNS if col not in header]
+            if missing:
+                raise UserError(_("Missing column(s): %s") % ", ".join(missing))
+            index = [header.index(col) for col in IMPORT_COLUMNS]
+            for line, row in enumerate(rows, start=2):
+                row = list(row) + [""] * (len(header) - len(row))
+                yield line, [row[i] for i in index]
+
+    def _parse_row(self, values):
+        """ Return (reference, partner, number, date) or raise ValueError """
+        reference, partner, number, date = values
+        reference, partner, number = (
+            str(value).strip() for value in (reference, partner, number)
+        )
+        if not reference or not partner or not number:
+            raise ValueError(_("Reference, partner and tax invoice number required"))
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        elif not isinstance(date, datetime.date):
+            date = fields.Date.to_date(str(date).strip()[:10])
+        if not date:
+            raise ValueError(_("Tax invoice date required"))
+        return reference, partner, number, date
+
+    def _match_tax_invoices(self, references, partners):
+        """ Return [(row index, tax_invoice_id)] with one query for a chunk.
+        Reference is matched with vendor bill number, its reference, payment
+        number or payment memo. Partner is matched with tax ID or name.
+        Each match is an equality join, served by an index """
+        self._cr.execute(
+            """
+            with r as (
+                select * from unnest(%s::varchar[], %s::varchar[])
+                    with ordinality as r(reference, partner, idx)
+                where reference != '/'
+            ), move_refs as (
+                select r.idx, r.partner, m.id as move_id
+                from r join account_move m on m.name = r.reference
+                where m.state = 'draft'
+                union
+                select r.idx, r.partner, m.id
+                from r join account_move m on m.ref = r.reference
+                where m.state = 'draft'
+            ), payment_refs as (
+                select r.idx, r.partner, p.id as payment_id
+                from r join account_payment p on p.name = r.reference
+                where p.to_clear_tax
+                union
+                select r.idx, r.partner, p.id
+                from r join account_payment p on p.communication = r.reference
+                where p.to_clear_tax
+            ), matches as (
+                select mr.idx, mr.partner, t.id
+                from move_refs mr
+                join account_move_tax_invoice t on t.move_id = mr.move_id
+                union
+                select pr.idx, pr.partner, t.id
+                from payment_refs pr
+                join account_move_tax_invoice t on t.payment_id = pr.payment_id
+            )
+            select mt.idx, t.id
+            from matches mt
+            join account_move_tax_invoice t on t.id = mt.id
+            join account_move m on m.id = t.move_id
+            join res_partner rp on rp.id = t.partner_id
+            where m.state = 'draft' and m.company_id = %s
+              and t.reversing_id is null and t.reversed_id is null
+              and mt.partner in (rp.vat, rp.name)
+            order by mt.idx
+        """,
+            (references, partners, self.env.company.id),
+        )
+        return [(idx - 1, taxinv_id) for idx, taxinv_id in self._cr.fetchall()]
+
+    def _import_chunk(self, chunk, reject):
+        """ Write tax invoice number and date of a chunk of rows with one
+        update, return {payment_id: line} of updated payments """
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        rows = []
+        for line, values in chunk:
+            try:
+                rows.append((line, self._parse_row(values)))
+            except ValueError as e:
+                reject(line, values, str(e))
+        if not rows:
+            return {}
+        matches = self._match_tax_invoices(
+            [vals[0] for _line, vals in rows], [vals[1] for _line, vals in rows]
+        )
+        # Later row wins when many rows match the same tax invoice
+        taxinv_values = {}
+        matched = set()
+        for idx, taxinv_id in matches:
+            _line, (_ref, _partner, number, date) = rows[idx]
+            taxinv_values[taxinv_id] = (number, date)
+            matched.add(idx)
+        for idx, (line, values) in enumerate(rows):
+            if idx not in matched:
+                reject(line, values, _("No matching draft tax invoice"))
+        TaxInvoice._write_number_date(taxinv_values)
+        payment_lines = {}
+        for idx, taxinv_id in matches:
+            payment = TaxInvoice.browse(taxinv_id).payment_id
+            if payment.to_clear_tax:
+                payment_lines[payment.id] = rows[idx][0]
+        # Keep memory bounded, nothing of this chunk is needed anymore
+        TaxInvoice.flush()
+        TaxInvoice.invalidate_cache()
+        return payment_lines
+
+    def action_import(self):
+        self.ensure_one()
+        # Rejected rows are written to a temporary file as they come
+        with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as reject_file:
+            self._import(reject_file)
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def _import(self, reject_file):
+        """ Import all rows, write rejected rows to reject_file """
+        writer = csv.writer(reject_file)
+        writer.writerow(["line"] + IMPORT_COLUMNS + ["error"])
+        counter = {"total": 0, "reject": 0, "not_cleared": 0}
+
+        def reject(line, values, error):
+            counter["reject"] += 1
+            writer.writerow([line] + [str(value) for value in values] + [error])
+
+        payment_lines = {}
+        rows = self._iter_rows()
+        while True:
+            chunk = list(islice(rows, IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            counter["total"] += len(chunk)
+            payment_lines.update(self._import_chunk(chunk, reject))
+            _logger.info("Tax invoice import: %s rows processed", counter["total"])
+        # Post deferred journal entries of payments
+        if self.clear_tax and payment_lines:
+            payments = self.env["account.payment"].browse(list(payment_lines))
+            errors = payments._clear_tax_cash_basis_batch()
+            # Rows are imported, only their payment is not cleared
+            for payment, error in errors.items():
+                counter["not_cleared"] += 1
+                writer.writerow(
+                    [payment_lines[payment.id], payment.name, "", "", "", error]
+                )
+        result = _("%s row(s) imported, %s rejected") % (
+            counter["total"] - counter["reject"],
+            counter["reject"],
+        )
+        if counter["not_cleared"]:
+            result += _(", %s payment(s) not cleared") % counter["not_cleared"]
+        vals = {"state": "done", "result": result}
+        if counter["reject"] or counter["not_cleared"]:
+            reject_file.seek(0)
+            vals.update(
+                {
+                    "reject_file": base64.b64encode(reject_file.read().encode("utf-8")),
+                    "reject_filename": "reject_{}.csv".format(
+                        (self.filename or "import").rsplit(".", 1)[0]
+                    ),
+                }
+            )
+        self.write(vals)
@@ -0,0 +1,30 @@
+# Copyright 2020 Ecosoft Co., Ltd (http://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+from odoo import api, fields, models
+
+
+class TaxInvoiceReportMonth(models.TransientModel):
+    _name = "tax.invoice.report.month"
+    _description = "Change Report Month of Tax Invoices"
+
+    report_late_mo = fields.Selection(
+        selection="_get_report_late_mo_selection",
+        string="Report Late",
+        default="1",
+        required=True,
+        help="Report date of all selected tax invoices will be end of month, "
+        "of tax invoice date plus this number of months",
+    )
+
+    @api.model
+    def _get_report_late_mo_selection(self):
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        return TaxInvoice._fields["report_late_mo"].selection
+
+    def action_change_report_month(self):
+        self.ensure_one()
+        tax_invoices = self.env["account.move.tax.invoice"].browse(
+            self._context.get("active_ids", [])
+        )
+        tax_invoices._set_report_late_mo(self.report_late_mo)
+        return {"type": "ir.actions.act_window_close"}
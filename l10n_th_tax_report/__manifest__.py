@@ -3,7 +3,7 @@
 
 {
     "name": "Thailand Localization - TAX Reports",
-    "version": "13.0.1.2.0",
+    "version": "13.0.1.3.0",
     "author": "Ecosoft, Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/l10n-thailand",
     "license": "AGPL-3",
@@ -13,8 +13,10 @@
         "report_xlsx_helper",
         "l10n_th_partner",
         "l10n_th_tax_invoice",
+        "l10n_th_report_async",
     ],
     "data": [
+        "security/ir.model.access.csv",
         "data/paper_format.xml",
         "data/report_data.xml",
         "reports/tax_report.xml",
@@ -0,0 +1,156 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import api, models
+
+# Changing these fields may change the tax report summary
+SUMMARY_FIELDS = {
+    "tax_invoice_number",
+    "tax_invoice_date",
+    "report_late_mo",
+    "partner_id",
+    "tax_base_amount",
+    "balance",
+    "reversing_id",
+    "reversed_id",
+    "move_line_id",
+    "move_id",
+    "payment_id",
+}
+# Summary also reads these fields of move, move line and payment
+MOVE_SUMMARY_FIELDS = {"name", "state"}
+MOVE_LINE_SUMMARY_FIELDS = {"account_id", "tax_line_id"}
+PAYMENT_SUMMARY_FIELDS = {"communication"}
+
+
+class AccountMoveTaxInvoice(models.Model):
+    _inherit = "account.move.tax.invoice"
+
+    def _get_tax_report_summary_keys(self):
+        return {
+            (
+                rec.company_id.id,
+                rec.report_date,
+                rec.partner_id.id or None,
+                rec.tax_invoice_number,
+            )
+            for rec in self
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        Summary = self.env["tax.report.summary"]
+        if not Summary._is_refresh_skipped():
+            Summary._refresh_or_collect(records._get_tax_report_summary_keys())
+        return records
+
+    def write(self, vals):
+        Summary = self.env["tax.report.summary"]
+        if not (SUMMARY_FIELDS & set(vals)) or Summary._is_refresh_skipped():
+            return super().write(vals)
+        keys = self._get_tax_report_summary_keys()
+        res = super().write(vals)
+        keys |= self._get_tax_report_summary_keys()
+        Summary._refresh_or_collect(keys)
+        return res
+
+    @api.model
+    def _write_number_date(self, values):
+        Summary = self.env["tax.report.summary"]
+        if Summary._is_refresh_skipped():
+            return super()._write_number_date(values)
+        records = self.browse(list(values))
+        keys = records._get_tax_report_summary_keys()
+        res = super()._write_number_date(values)
+        keys |= records._get_tax_report_summary_keys()
+        Summary._refresh_or_collect(keys)
+        return res
+
+    def _set_report_late_mo(self, report_late_mo):
+        keys = self._get_tax_report_summary_keys()
+        res = super()._set_report_late_mo(report_late_mo)
+        keys |= self._get_tax_report_summary_keys()
+        self.env["tax.report.summary"]._refresh_or_collect(keys)
+        return res
+
+    def unlink(self):
+        keys = self._get_tax_report_summary_keys()
+        res = super().unlink()
+        self.env["tax.report.summary"]._refresh_or_collect(keys)
+        return res
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def _refresh_tax_report_summary(self, keys=None):
+        """ Update tax report summary once for all tax invoices of moves """
+        keys = set(keys or [])
+        keys |= self.mapped("tax_invoice_ids")._get_tax_report_summary_keys()
+        self.env["tax.report.summary"]._refresh_or_collect(keys)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if (
+            MOVE_SUMMARY_FIELDS & set(vals)
+            and not self.env["tax.report.summary"]._is_refresh_skipped()
+        ):
+            self._refresh_tax_report_summary()
+        return res
+
+    def post(self):
+        """ Summary is refreshed once after posting, for tax invoices of the
+        moves and all tax invoices changed meanwhile, e.g., of other moves
+        posted by reconciliation """
+        keys = self.mapped("tax_invoice_ids")._get_tax_report_summary_keys()
+        self_defer = self.with_context(
+            defer_tax_report_summary=True, tax_report_summary_keys=keys
+        )
+        res = super(AccountMove, self_defer).post()
+        self._refresh_tax_report_summary(keys)
+        return res
+
+    @api.model
+    def _assign_tax_invoice_number(self, tax_invoices):
+        """ Numbers are also allocated out of posting, refresh once here """
+        Summary = self.env["tax.report.summary"]
+        self_defer = self.with_context(defer_tax_report_summary=True)
+        res = super(AccountMove, self_defer)._assign_tax_invoice_number(tax_invoices)
+        if not Summary._is_refresh_skipped():
+            Summary._refresh_or_collect(tax_invoices._get_tax_report_summary_keys())
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = "account.move.line"
+
+    def write(self, vals):
+        res = super().write(vals)
+        Summary = self.env["tax.report.summary"]
+        if MOVE_LINE_SUMMARY_FIELDS & set(vals) and not Summary._is_refresh_skipped():
+            Summary._refresh_or_collect(
+                self.mapped("tax_invoice_ids")._get_tax_report_summary_keys()
+            )
+        return res
+
+    def unlink(self):
+        """ Tax invoices of lines are deleted by the database cascade """
+        keys = self.mapped("tax_invoice_ids")._get_tax_report_summary_keys()
+        res = super().unlink()
+        self.env["tax.report.summary"]._refresh_or_collect(keys)
+        return res
+
+
+class AccountPayment(models.Model):
+    _inherit = "account.payment"
+
+    def write(self, vals):
+        res = super().write(vals)
+        Summary = self.env["tax.report.summary"]
+        if PAYMENT_SUMMARY_FIELDS & set(vals) and not Summary._is_refresh_skipped():
+            tax_invoices = self.env["account.move.tax.invoice"].search(
+                [("payment_id", "in", self.ids)]
+            )
+            Summary._refresh_or_collect(tax_invoices._get_tax_report_summary_keys())
+        return res
@@ -0,0 +1,145 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Aggregate valid tax invoices, same rules as the original tax report query
+SUMMARY_SELECT = """
+    select t.company_id, ml.tax_line_id as tax_id, ml.account_id, t.partner_id,
+        t.report_date, t.tax_invoice_number as number,
+        case when ml.parent_state = 'posted' and t.reversing_id is null
+            then t.tax_invoice_number else
+            t.tax_invoice_number || ' (VOID)' end as tax_invoice_number,
+        t.tax_invoice_date as tax_date,
+        case when p.communication is not null
+            then p.communication else ml.move_name end as name,
+        sum(case when ml.parent_state = 'posted' and t.reversing_id is null
+            then t.tax_base_amount else 0.0 end) as tax_base_amount,
+        sum(case when ml.parent_state = 'posted' and t.reversing_id is null
+            then t.balance else 0.0 end) as tax_amount
+    from account_move_tax_invoice t
+      join account_move_line ml on ml.id = t.move_line_id
+      left outer join account_payment p on p.id = t.payment_id
+    {keys_join}
+    where ml.parent_state in ('posted', 'cancel')
+      and t.tax_invoice_number is not null
+      and t.reversed_id is null
+    group by 1, 2, 3, 4, 5, 6, 7, 8, 9
+"""
+
+SUMMARY_INSERT = """
+    insert into tax_report_summary (
+        company_id, tax_id, account_id, partner_id, report_date, number,
+        tax_invoice_number, tax_date, name, tax_base_amount, tax_amount)
+"""
+
+SUMMARY_KEYS = """
+    with keys as (
+        select * from unnest(%s::int[], %s::date[], %s::int[], %s::varchar[])
+        as k(company_id, report_date, partner_id, number)
+    )
+"""
+
+
+class TaxReportSummary(models.Model):
+    _name = "tax.report.summary"
+    _description = "Tax Report Summary"
+    _order = "report_date, tax_date, tax_invoice_number"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name="res.company", readonly=True)
+    tax_id = fields.Many2one(comodel_name="account.tax", readonly=True)
+    account_id = fields.Many2one(comodel_name="account.account", readonly=True)
+    partner_id = fields.Many2one(comodel_name="res.partner", readonly=True)
+    report_date = fields.Date(readonly=True)
+    number = fields.Char(
+        readonly=True, help="Tax invoice number as on tax invoice, used as key"
+    )
+    tax_invoice_number = fields.Char(readonly=True)
+    tax_date = fields.Date(readonly=True)
+    name = fields.Char(readonly=True)
+    tax_base_amount = fields.Float(readonly=True)
+    tax_amount = fields.Float(readonly=True)
+
+    def init(self):
+        self._cr.execute(
+            "SELECT indexname FROM pg_indexes WHERE indexname = %s",
+            ("tax_report_summary_key_idx",),
+        )
+        if not self._cr.fetchone():
+            self._cr.execute(
+                """
+                CREATE INDEX tax_report_summary_key_idx ON tax_report_summary
+                (company_id, report_date, number)
+            """
+            )
+        # First install, summarize existing tax invoices
+        self._cr.execute("SELECT 1 FROM tax_report_summary LIMIT 1")
+        if not self._cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """ Summarize all tax invoices from scratch """
+        _logger.info("Rebuild tax report summary")
+        self.flush()
+        self._cr.execute("DELETE FROM tax_report_summary")
+        self._cr.execute(SUMMARY_INSERT + SUMMARY_SELECT.format(keys_join=""))
+        self.invalidate_cache()
+
+    @api.model
+    def _refresh(self, keys):
+        """ Summarize again only tax invoices matching keys,
+        i.e., {(company_id, report_date, partner_id, tax_invoice_number), ...} """
+        keys = [k for k in keys if k[0] and k[1] and k[3]]
+        if not keys:
+            return
+        self.flush()
+        company_ids, report_dates, partner_ids, numbers = (
+            list(values) for values in zip(*keys)
+        )
+        params = (company_ids, report_dates, partner_ids, numbers)
+        self._cr.execute(
+            SUMMARY_KEYS
+            + """
+            delete from tax_report_summary s using keys k
+            where s.company_id = k.company_id and s.report_date = k.report_date
+              and s.partner_id is not distinct from k.partner_id
+              and s.number = k.number
+        """,
+            params,
+        )
+        keys_join = """
+            join keys k on k.company_id = t.company_id
+              and k.report_date = t.report_date
+              and k.partner_id is not distinct from t.partner_id
+              and k.number = t.tax_invoice_number
+        """
+        self._cr.execute(
+            SUMMARY_KEYS
+            + SUMMARY_INSERT
+            + SUMMARY_SELECT.format(keys_join=keys_join),
+            params,
+        )
+        self.invalidate_cache()
+
+    @api.model
+    def _is_refresh_skipped(self):
+        """ Refresh is deferred by context defer_tax_report_summary, without
+        collecting keys, the caller then refreshes the summary by itself """
+        return bool(self._context.get("defer_tax_report_summary")) and (
+            self._context.get("tax_report_summary_keys") is None
+        )
+
+    @api.model
+    def _refresh_or_collect(self, keys):
+        """ Refresh keys now, or while deferred, add them to the set in context
+        tax_report_summary_keys, which its owner refreshes once at the end """
+        collected_keys = self._context.get("tax_report_summary_keys")
+        if collected_keys is None:
+            return self._refresh(keys)
+        collected_keys |= keys
@@ -3,6 +3,9 @@
 
 from odoo import api, fields, models
 
+# Number of lines fetched at a time when streaming report lines
+STREAM_CHUNK_SIZE = 5000
+
 
 class TaxReportView(models.TransientModel):
     _name = "tax.report.view"
@@ -10,6 +13,8 @@ class TaxReportView(models.TransientModel):
     _order = "id"
 
     name = fields.Char()
+    tax_id = fields.Many2one("account.tax")
+    date_range_id = fields.Many2one("date.range")
     company_id = fields.Many2one("res.company")
     account_id = fields.Many2one("account.account")
     partner_id = fields.Many2one("res.partner")
@@ -29,6 +34,9 @@ class TaxReport(models.TransientModel):
     date_range_id = fields.Many2one(comodel_name="date.range")
     date_from = fields.Date()
     date_to = fields.Date()
+    # Optional, report many taxes / periods at once (XLSX, 1 sheet each)
+    tax_ids = fields.Many2many(comodel_name="account.tax")
+    date_range_ids = fields.Many2many(comodel_name="date.range")
 
     # Data fields, used to browse report data
     results = fields.Many2many(
@@ -37,63 +45,90 @@ class TaxReport(models.TransientModel):
         help="Use compute fields, so there is nothing store in database",
     )
 
-    def _compute_results(self):
+    def _get_partitions(self):
+        """ Return [(tax, date_range)], one report partition for each """
+        self.ensure_one()
+        taxes = self.tax_ids or self.tax_id
+        date_ranges = (self.date_range_ids or self.date_range_id).sorted("date_start")
+        return [(tax, date_range) for tax in taxes for date_range in date_ranges]
+
+    def _get_results_query(self, partitions=None):
+        """ Return (query, params) of report lines of partitions (default all),
+        read from tax summary, ordered by tax and period """
         self.ensure_one()
+        partitions = partitions or self._get_partitions()
+        tax_ids = tuple({tax.id for tax, _dr in partitions})
+        date_range_ids = tuple({date_range.id for _tax, date_range in partitions})
+        query = """
+            select tx.tax_id, dr.id date_range_id,
+                s.company_id, s.account_id, s.partner_id,
+                s.tax_invoice_number, s.tax_date, s.name,
+                sum(s.tax_base_amount) tax_base_amount,
+                sum(s.tax_amount) tax_amount
+            from tax_report_summary s
+              join (select distinct account_id,
+                        coalesce(invoice_tax_id, refund_tax_id) as tax_id
+                    from account_tax_repartition_line
+                    where account_id is not null
+                      and coalesce(invoice_tax_id, refund_tax_id) in %s
+                    ) tx on tx.account_id = s.account_id
+              join date_range dr on s.report_date >= dr.date_start
+                and s.report_date <= dr.date_end
+            where dr.id in %s
+              and s.company_id = %s
+            group by tx.tax_id, dr.id, dr.date_start,
+                s.company_id, s.account_id, s.partner_id,
+                s.tax_invoice_number, s.tax_date, s.name
+            order by tx.tax_id, dr.date_start, s.tax_date, s.tax_invoice_number
+        """
+        params = (tax_ids, date_range_ids, self.company_id.id)
+        return query, params
+
+    def _iter_results(self, chunk_size=STREAM_CHUNK_SIZE):
+        """ Yield report lines (dict) by chunk from a server side cursor,
+        so large report can be exported without loading all lines """
+        query, params = self._get_results_query()
+        self.env["tax.report.summary"].flush()
         self._cr.execute(
-            """
-            select company_id, account_id, partner_id,
-                tax_invoice_number, tax_date, name,
-                sum(tax_base_amount) tax_base_amount, sum(tax_amount) tax_amount
-            from (
-            select t.id, t.company_id, ml.account_id, t.partner_id,
-              case when ml.parent_state = 'posted' and t.reversing_id is null
-                then t.tax_invoice_number else
-                t.tax_invoice_number || ' (VOID)' end as tax_invoice_number,
-              t.tax_invoice_date as tax_date,
-              case when ml.parent_state = 'posted' and t.reversing_id is null
-                then t.tax_base_amount else 0.0 end as tax_base_amount,
-              case when ml.parent_state = 'posted' and t.reversing_id is null
-                then t.balance else 0.0 end as tax_amount,
-              case when p.communication is not null
-                then p.communication else ml.move_name end as name
-            from account_move_tax_invoice t
-              join account_move_line ml on ml.id = t.move_line_id
-              left outer join account_payment p on p.id = t.payment_id
-            where ml.parent_state in ('posted', 'cancel')
-              and t.tax_invoice_number is not null
-              and ml.account_id in (select distinct account_id
-                                    from account_tax_repartition_line
-                                    where account_id is not null
-                                    and invoice_tax_id = %s or refund_tax_id = %s)
-              and t.report_date >= %s and t.report_date <= %s
-              and ml.company_id = %s
-              and t.reversed_id is null
-            ) a
-            group by company_id, account_id, partner_id,
-                tax_invoice_number, tax_date, name
-            order by tax_date, tax_invoice_number
-        """,
-            (
-                self.tax_id.id,
-                self.tax_id.id,
-                self.date_from,
-                self.date_to,
-                self.company_id.id,
-            ),
+            "declare tax_report_cursor no scroll cursor for " + query, params
         )
+        try:
+            while True:
+                self._cr.execute(
+                    "fetch forward %s from tax_report_cursor", (chunk_size,)
+                )
+                lines = self._cr.dictfetchall()
+                if not lines:
+                    break
+                yield lines
+        finally:
+            self._cr.execute("close tax_report_cursor")
+
+    def _compute_results(self):
+        self.ensure_one()
+        self.env["tax.report.summary"].flush()
+        # View and PDF show the main tax and period only
+        partitions = [(self.tax_id, self.date_range_id)]
+        self._cr.execute(*self._get_results_query(partitions))
         tax_report_results = self._cr.dictfetchall()
+        self.results = self._build_results(tax_report_results)
+
+    @api.model
+    def _build_results(self, lines):
+        """ Create all virtual report lines in one pass, concat is linear """
         ReportLine = self.env["tax.report.view"]
-        self.results = False
-        for line in tax_report_results:
-            self.results += ReportLine.new(line)
+        return ReportLine.concat(*[ReportLine.new(line) for line in lines])
 
-    def print_report(self, report_type="qweb"):
-        self.ensure_one()
-        action = (
+    def _get_report_action(self, report_type):
+        return (
             report_type == "xlsx"
             and self.env.ref("l10n_th_tax_report.action_tax_report_xlsx")
             or self.env.ref("l10n_th_tax_report.action_tax_report_pdf")
         )
+
+    def print_report(self, report_type="qweb"):
+        self.ensure_one()
+        action = self._get_report_action(report_type)
         return action.report_action(self, config=False)
 
     def _get_html(self):
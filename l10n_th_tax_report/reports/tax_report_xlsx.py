@@ -67,21 +67,77 @@ class ReportTaxReportXlsx(models.TransientModel):
                 "width": 18,
             },
         }
-        ws_params = {
-            "ws_name": "TAX Report",
-            "generate_ws_method": "_vat_report",
-            "title": "TAX Report",
-            "wanted_list": [k for k in sorted(tax_template.keys())],
-            "col_specs": tax_template,
-        }
-        if objects.tax_id.type_tax_use == "sale":
-            ws_params["ws_name"] = "Sale TAX Report"
-            ws_params["title"] = "Sale TAX Report"
-        elif objects.tax_id.type_tax_use == "purchase":
-            ws_params["ws_name"] = "Purchase TAX Report"
-            ws_params["title"] = "Purchase TAX Report"
+        ws_params_list = []
+        partitions = objects._get_partitions()
+        for index, (tax, date_range) in enumerate(partitions, 1):
+            title = "TAX Report"
+            if tax.type_tax_use == "sale":
+                title = "Sale TAX Report"
+            elif tax.type_tax_use == "purchase":
+                title = "Purchase TAX Report"
+            ws_name = title
+            if len(partitions) > 1:
+                # Many sheets, name must be unique once truncated to 31 chars
+                ws_name = "{}. {} {}".format(index, tax.name, date_range.name)
+            ws_params_list.append(
+                {
+                    "ws_name": ws_name,
+                    "generate_ws_method": "_vat_report",
+                    "title": title,
+                    "wanted_list": [k for k in sorted(tax_template.keys())],
+                    "col_specs": tax_template,
+                    "tax": tax,
+                    "date_range": date_range,
+                }
+            )
+        return ws_params_list
+
+    def generate_xlsx_report(self, workbook, data, objects):
+        """ Write report header of all sheets (tax and period) first,
+        then dispatch lines of all sheets from one query """
+        self._define_formats(workbook)
+        sheets = {}
+        for ws_params in self._get_ws_params(workbook, data, objects):
+            ws = workbook.add_worksheet(self._check_ws_name(ws_params["ws_name"]))
+            generate_ws_method = getattr(self, ws_params["generate_ws_method"])
+            row_pos = generate_ws_method(workbook, ws, ws_params, data, objects)
+            key = (ws_params["tax"].id, ws_params["date_range"].id)
+            sheets[key] = {
+                "ws": ws,
+                "ws_params": ws_params,
+                "row_pos": row_pos,
+                "header_pos": row_pos,
+                "total_base": 0.00,
+                "total_tax": 0.00,
+            }
+        Partner = self.env["res.partner"]
+        for lines in objects._iter_results():
+            partners = self._get_partner_data(
+                list({line["partner_id"] for line in lines if line["partner_id"]})
+            )
+            for line in lines:
+                sheet = sheets[(line["tax_id"], line["date_range_id"])]
+                self._write_vat_line(sheet, line, partners)
+            Partner.invalidate_cache()
+        for sheet in sheets.values():
+            sheet["ws"].write_row(
+                sheet["row_pos"],
+                6,
+                [sheet["total_base"], sheet["total_tax"]],
+                self.format_theader_blue_amount_right,
+            )
+
+    def get_workbook_options(self):
+        """ Rows are written in order, so they can be flushed to disk
+        one by one and export of large report use constant memory """
+        options = super().get_workbook_options()
+        options["constant_memory"] = True
+        return options
 
-        return [ws_params]
+    def _get_partner_data(self, partner_ids):
+        """ Read partner data needed by report lines in one query """
+        partners = self.env["res.partner"].browse(partner_ids)
+        return {p["id"]: p for p in partners.read(["display_name", "vat", "branch"])}
 
     def _vat_report(self, wb, ws, ws_params, data, objects):
         ws.set_portrait()
@@ -92,26 +148,29 @@ class ReportTaxReportXlsx(models.TransientModel):
         row_pos = 0
         # title
         row_pos = self._write_ws_title(ws, row_pos, ws_params, True)
-        # company data
-        ws.write_column(row_pos, 1, ["Period :", "Partner :"], self.format_left_bold)
-        ws.write_column(
-            row_pos,
-            2,
-            [
-                (objects.date_range_id.display_name) or "",
-                (objects.company_id.display_name) or "",
-            ],
-        )
-        ws.write_column(row_pos, 5, ["Tax ID :", "Branch ID :"], self.format_left_bold)
-        ws.write_column(
-            row_pos,
-            6,
-            [
-                (objects.company_id.partner_id.vat) or "",
-                (objects.company_id.partner_id.branch) or "",
-            ],
-        )
-        row_pos += 3
+        # company data, in constant_memory mode each row is written once
+        company = objects.company_id
+        company_rows = [
+            (
+                "Period :",
+                ws_params["date_range"].display_name,
+                "Tax ID :",
+                company.partner_id.vat,
+            ),
+            (
+                "Partner :",
+                company.display_name,
+                "Branch ID :",
+                company.partner_id.branch,
+            ),
+        ]
+        for label, value, label2, value2 in company_rows:
+            ws.write(row_pos, 1, label, self.format_left_bold)
+            ws.write(row_pos, 2, value or "")
+            ws.write(row_pos, 5, label2, self.format_left_bold)
+            ws.write(row_pos, 6, value2 or "")
+            row_pos += 1
+        row_pos += 1
         # vat report table
         row_pos = self._write_line(
             ws,
@@ -121,30 +180,27 @@ class ReportTaxReportXlsx(models.TransientModel):
             default_format=self.format_theader_blue_left,
         )
         ws.freeze_panes(row_pos, 0)
-        for obj in objects:
-            total_base = 0.00
-            total_tax = 0.00
-            for line in obj.results:
-                total_base += line.tax_base_amount
-                total_tax += line.tax_amount
-                row_pos = self._write_line(
-                    ws,
-                    row_pos,
-                    ws_params,
-                    col_specs_section="data",
-                    render_space={
-                        "row_pos": row_pos - 5,
-                        "tax_date": line.tax_date or "",
-                        "tax_invoice_number": line.tax_invoice_number or "",
-                        "partner_name": line.partner_id.display_name or "",
-                        "partner_vat": line.partner_id.vat or "",
-                        "partner_branch": line.partner_id.branch or "",
-                        "tax_base_amount": line.tax_base_amount or 0.00,
-                        "tax_amount": line.tax_amount or 0.00,
-                        "doc_ref": line.name or "",
-                    },
-                    default_format=self.format_tcell_left,
-                )
-        ws.write_row(
-            row_pos, 6, [total_base, total_tax], self.format_theader_blue_amount_right
+        return row_pos
+
+    def _write_vat_line(self, sheet, line, partners):
+        partner = partners.get(line["partner_id"], {})
+        sheet["total_base"] += line["tax_base_amount"] or 0.00
+        sheet["total_tax"] += line["tax_amount"] or 0.00
+        sheet["row_pos"] = self._write_line(
+            sheet["ws"],
+            sheet["row_pos"],
+            sheet["ws_params"],
+            col_specs_section="data",
+            render_space={
+                "row_pos": sheet["row_pos"] - sheet["header_pos"] + 1,
+                "tax_date": line["tax_date"] or "",
+                "tax_invoice_number": line["tax_invoice_number"] or "",
+                "partner_name": partner.get("display_name") or "",
+                "partner_vat": partner.get("vat") or "",
+                "partner_branch": partner.get("branch") or "",
+                "tax_base_amount": line["tax_base_amount"] or 0.00,
+                "tax_amount": line["tax_amount"] or 0.00,
+                "doc_ref": line["name"] or "",
+            },
+            default_format=self.format_tcell_left,
         )
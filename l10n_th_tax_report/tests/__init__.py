@@ -0,0 +1,8 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from . import test_tax_report_benchmark
+from . import test_tax_report_job_concurrency
+from . import test_tax_report_summary
+from . import test_tax_report_wizard
+from . import test_tax_report_xlsx
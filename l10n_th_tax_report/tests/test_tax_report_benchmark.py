@@ -0,0 +1,44 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import logging
+import time
+
+from odoo.tests.common import SavepointCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "benchmark")
+class TestTaxReportBenchmark(SavepointCase):
+    """ Run with --test-tags=benchmark """
+
+    def _build(self, size):
+        lines = [
+            {
+                "company_id": self.env.company.id,
+                "tax_invoice_number": "INV%06d" % i,
+                "tax_date": "2020-01-31",
+                "name": "MOVE%06d" % i,
+                "tax_base_amount": 100.0,
+                "tax_amount": 7.0,
+            }
+            for i in range(size)
+        ]
+        start = time.time()
+        results = self.env["report.tax.report"]._build_results(lines)
+        elapsed = time.time() - start
+        self.assertEqual(len(results), size)
+        _logger.info(
+            "Build %s tax report lines: %.3fs (%.1f us/line)",
+            size,
+            elapsed,
+            elapsed / size * 1000000,
+        )
+        return elapsed / size
+
+    def test_build_results_linear(self):
+        """ Time per line should not grow with number of lines """
+        per_line = [self._build(size) for size in (1000, 10000, 100000)]
+        # Generous margin for noise, quadratic build would be ~100x
+        self.assertLess(per_line[2], per_line[0] * 5)
@@ -0,0 +1,71 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from odoo import SUPERUSER_ID, api, sql_db
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+RUNNERS = 3
+RENDER_TIME = 1.0
+
+
+@tagged("-standard", "benchmark")
+class TestTaxReportJobConcurrency(TransactionCase):
+    """ Run with --test-tags=benchmark
+
+    XLSX of each company is queued as a background job. RUNNERS runners,
+    as run by the scheduled actions, render one job each at the same time.
+    Rendering is replaced by a sleep of RENDER_TIME, as if rendered by
+    another cron worker. Runners use their own cursors, so jobs are
+    committed and removed on tearDown. """
+
+    def setUp(self):
+        super().setUp()
+        self.db = sql_db.db_connect(self.env.cr.dbname)
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            jobs = env["report.async.job"]
+            for i in range(RUNNERS):
+                jobs |= jobs._create_job(
+                    "report.tax.report", {}, "xlsx", "Concurrency {}".format(i)
+                )
+            self.job_ids = jobs.ids
+
+    def tearDown(self):
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            jobs = env["report.async.job"].browse(self.job_ids)
+            jobs.mapped("attachment_id").unlink()
+            jobs.unlink()
+        super().tearDown()
+
+    def _run_runner(self, _runner):
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env["report.async.job"]._cron_run_jobs(limit=1)
+
+    def test_runners_render_jobs_at_same_time(self):
+        def render(job):
+            time.sleep(RENDER_TIME)
+            return b"XLSX", "xlsx"
+
+        start = time.time()
+        with patch.object(type(self.env["report.async.job"]), "_render", render):
+            with ThreadPoolExecutor(max_workers=RUNNERS) as executor:
+                list(executor.map(self._run_runner, range(RUNNERS)))
+        elapsed = time.time() - start
+        _logger.info("%s jobs by %s runners: %.3fs", RUNNERS, RUNNERS, elapsed)
+        with api.Environment.manage(), self.db.cursor(serialized=False) as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            jobs = env["report.async.job"].browse(self.job_ids)
+            # Each job is rendered once, by one runner
+            self.assertEqual(set(jobs.mapped("state")), {"done"})
+            self.assertEqual(len(jobs.mapped("attachment_id")), RUNNERS)
+        # Runners do not wait for each other, total is about one rendering
+        self.assertLess(elapsed, RENDER_TIME * RUNNERS * 0.7)
@@ -0,0 +1,237 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import fields
+from odoo.tests.common import SavepointCase
+
+from odoo.addons.l10n_th_tax_report.models.tax_report_summary import SUMMARY_SELECT
+
+SUMMARY_COLUMNS = """
+    company_id, tax_id, account_id, partner_id, report_date, number,
+    tax_invoice_number, tax_date, name, tax_base_amount, tax_amount
+"""
+
+
+class TestTaxReportSummary(SavepointCase):
+    """ Tax report summary must always be the same as aggregating
+    tax invoices from scratch """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        type_liability = cls.env.ref("account.data_account_type_current_liabilities")
+        cls.journal_sale = cls.env["account.journal"].search(
+            [("type", "=", "sale")], limit=1
+        )
+        cls.journal_purchase = cls.env["account.journal"].search(
+            [("type", "=", "purchase")], limit=1
+        )
+        cls.partner = cls.env.ref("base.res_partner_12")
+        cls.sequence = cls.env["ir.sequence"].create(
+            {"name": "Summary Tax Invoice", "prefix": "STX", "padding": 4}
+        )
+        cls.output_vat = cls._create_tax("SO7", "sale", type_liability)
+        cls.output_vat.taxinv_sequence_id = cls.sequence
+        cls.input_vat = cls._create_tax("SV7", "purchase", type_liability)
+        # Undue output VAT, cleared by payment on cash basis
+        type_asset = cls.env.ref("account.data_account_type_current_assets")
+        undue_account = cls.env["account.account"].create(
+            {"name": "SDO7", "code": "SDO7", "user_type_id": type_asset.id}
+        )
+        cls.undue_output_vat = cls._create_tax("SUO7", "sale", type_liability)
+        cls.undue_output_vat.write(
+            {
+                "tax_exigibility": "on_payment",
+                "cash_basis_transition_account_id": undue_account.id,
+            }
+        )
+        journal_undue = cls.env["account.journal"].create(
+            {"name": "Summary Undue", "type": "general", "code": "SUNDU"}
+        )
+        cls.env.ref("base.main_company").write(
+            {"tax_exigibility": True, "tax_cash_basis_journal_id": journal_undue.id}
+        )
+
+    @classmethod
+    def _create_tax(cls, name, type_tax_use, user_type):
+        account = cls.env["account.account"].create(
+            {"name": name, "code": name, "user_type_id": user_type.id}
+        )
+        return cls.env["account.tax"].create(
+            {
+                "name": name,
+                "type_tax_use": type_tax_use,
+                "amount_type": "percent",
+                "amount": 7.0,
+                "tax_exigibility": "on_invoice",
+                "invoice_repartition_line_ids": [
+                    (0, 0, {"factor_percent": 100.0, "repartition_type": "base"}),
+                    (
+                        0,
+                        0,
+                        {
+                            "factor_percent": 100.0,
+                            "repartition_type": "tax",
+                            "account_id": account.id,
+                        },
+                    ),
+                ],
+            }
+        )
+
+    def _create_invoice(self, invoice_type, tax):
+        journal = self.journal_sale
+        if invoice_type == "in_invoice":
+            journal = self.journal_purchase
+        account = self.env["account.account"].search(
+            [("user_type_id.internal_group", "in", ["income", "expense"])], limit=1
+        )
+        invoice = self.env["account.move"].create(
+            {
+                "partner_id": self.partner.id,
+                "journal_id": journal.id,
+                "type": invoice_type,
+                "invoice_date": fields.Date.today(),
+                "invoice_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "account_id": account.id,
+                            "name": "Summary",
+                            "quantity": 1.0,
+                            "price_unit": 100.0,
+                            "tax_ids": [(6, 0, [tax.id])],
+                        },
+                    )
+                ],
+            }
+        )
+        if invoice_type == "in_invoice":
+            invoice.tax_invoice_ids.write(
+                {
+                    "tax_invoice_number": "SUM-{}".format(invoice.id),
+                    "tax_invoice_date": fields.Date.today(),
+                }
+            )
+        return invoice
+
+    def _fetch(self, query):
+        self.env.cr.execute(query)
+        return sorted(
+            (
+                row[:9] + (round(row[9], 2), round(row[10], 2))
+                for row in self.env.cr.fetchall()
+            ),
+            key=str,
+        )
+
+    def assertSummary(self):
+        self.env["account.move.tax.invoice"].flush()
+        self.env["tax.report.summary"].flush()
+        summary = self._fetch(
+            "select {} from tax_report_summary".format(SUMMARY_COLUMNS)
+        )
+        aggregated = self._fetch(SUMMARY_SELECT.format(keys_join=""))
+        self.assertEqual(summary, aggregated)
+
+    def _get_summary(self, tax_invoices):
+        return self.env["tax.report.summary"].search(
+            [("number", "in", tax_invoices.mapped("tax_invoice_number"))]
+        )
+
+    def test_01_post_draft_cancel(self):
+        invoice = self._create_invoice("out_invoice", self.output_vat)
+        invoice.action_post()
+        self.assertSummary()
+        self.assertEqual(self._get_summary(invoice.tax_invoice_ids).tax_amount, 7.0)
+        invoice.button_draft()
+        self.assertSummary()
+        self.assertFalse(self._get_summary(invoice.tax_invoice_ids))
+        invoice.button_cancel()
+        self.assertSummary()
+
+    def test_02_reversal(self):
+        invoice = self._create_invoice("out_invoice", self.output_vat)
+        invoice.action_post()
+        invoice._reverse_moves(
+            [{"date": fields.Date.today(), "ref": "Reversal"}], cancel=True
+        )
+        self.assertSummary()
+
+    def test_03_unlink(self):
+        invoice = self._create_invoice("in_invoice", self.input_vat)
+        invoice.action_post()
+        tax_invoice = invoice.tax_invoice_ids
+        split = tax_invoice.copy(
+            {
+                "tax_invoice_number": "SUM-SPLIT",
+                "tax_invoice_date": fields.Date.today(),
+                "balance": 0.0,
+            }
+        )
+        self.assertSummary()
+        self.assertTrue(self._get_summary(split))
+        split.unlink()
+        self.assertSummary()
+        summary = self.env["tax.report.summary"]
+        self.assertFalse(summary.search([("number", "=", "SUM-SPLIT")]))
+
+    def test_04_report_late_month(self):
+        invoice = self._create_invoice("in_invoice", self.input_vat)
+        invoice.action_post()
+        invoice.tax_invoice_ids._set_report_late_mo("2")
+        self.assertSummary()
+        summary = self._get_summary(invoice.tax_invoice_ids)
+        self.assertEqual(summary.report_date, invoice.tax_invoice_ids.report_date)
+
+    def test_05_allocator(self):
+        self.sequence.write(
+            {"implementation": "no_gap", "allocate_after_commit": True}
+        )
+        invoice = self._create_invoice("out_invoice", self.output_vat)
+        invoice.action_post()
+        self.assertTrue(invoice.tax_invoice_ids.number_pending)
+        self.env["tax.invoice.allocator"]._allocate_pending()
+        self.assertSummary()
+        self.assertTrue(self._get_summary(invoice.tax_invoice_ids))
+
+    def test_06_move_name(self):
+        """ Name of summary comes from move, it follows move changes """
+        invoice = self._create_invoice("in_invoice", self.input_vat)
+        invoice.action_post()
+        invoice.name = "SUMMARY/RENAMED"
+        self.assertSummary()
+        summary = self._get_summary(invoice.tax_invoice_ids)
+        self.assertEqual(summary.name, "SUMMARY/RENAMED")
+
+    def test_07_cash_basis_payment(self):
+        """ Tax invoices of cash basis move, created and posted through the
+        payment, and deleted with the move lines on reset to draft """
+        invoice = self._create_invoice("out_invoice", self.undue_output_vat)
+        invoice.action_post()
+        journal_bank = self.env["account.journal"].search(
+            [("type", "=", "bank")], limit=1
+        )
+        payment_method = self.env.ref("account.account_payment_method_manual_in")
+        payment = self.env["account.payment"].create(
+            {
+                "name": "SUMMARY/RECEIPT",
+                "payment_date": fields.Date.today(),
+                "payment_type": "inbound",
+                "amount": 107.0,
+                "journal_id": journal_bank.id,
+                "partner_type": "customer",
+                "partner_id": self.partner.id,
+                "payment_method_id": payment_method.id,
+                "invoice_ids": [(4, invoice.id)],
+            }
+        )
+        payment.post()
+        self.assertSummary()
+        payment.clear_tax_cash_basis()
+        self.assertSummary()
+        summary = self._get_summary(payment.tax_invoice_ids)
+        self.assertEqual(summary.tax_amount, 7.0)
+        payment.action_draft()
+        self.assertSummary()
@@ -0,0 +1,64 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import json
+
+from odoo.tests.common import SavepointCase
+
+
+class TestTaxReportWizard(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.company2 = cls.env["res.company"].create({"name": "Tax Report Co 2"})
+        cls.env.user.company_ids |= cls.company2
+        cls.tax = cls._create_tax(cls.company)
+        cls._create_tax(cls.company2)
+        date_range_type = cls.env["date.range.type"].create(
+            {"name": "Tax Report Month", "allow_overlap": True}
+        )
+        cls.date_range = cls.env["date.range"].create(
+            {
+                "name": "Tax Report 2020-01",
+                "type_id": date_range_type.id,
+                "date_start": "2020-01-01",
+                "date_end": "2020-01-31",
+            }
+        )
+        cls.wizard = cls.env["tax.report.wizard"].create(
+            {
+                "company_id": cls.company.id,
+                "tax_id": cls.tax.id,
+                "date_range_id": cls.date_range.id,
+                "company_ids": [(6, 0, cls.company2.ids)],
+            }
+        )
+
+    @classmethod
+    def _create_tax(cls, company):
+        return cls.env["account.tax"].create(
+            {
+                "name": "Tax Report VAT 7%",
+                "company_id": company.id,
+                "type_tax_use": "sale",
+                "amount_type": "percent",
+                "amount": 7.0,
+                "tax_exigibility": "on_invoice",
+            }
+        )
+
+    def test_01_export_xlsx_companies(self):
+        """ One background job for each company, with taxes of the company """
+        action = self.wizard.button_export_xlsx_companies()
+        jobs = self.env["report.async.job"].search(action["domain"])
+        self.assertEqual(len(jobs), 2)
+        company2_tax = self.env["account.tax"].search(
+            [("company_id", "=", self.company2.id), ("name", "=", self.tax.name)]
+        )
+        for company, tax in [(self.company, self.tax), (self.company2, company2_tax)]:
+            job = jobs.filtered(lambda l: l.company_id == company)
+            self.assertEqual(job.state, "queued")
+            self.assertEqual(job.report_type, "xlsx")
+            self.assertEqual(job.user_id, self.env.user)
+            self.assertEqual(json.loads(job.report_vals)["tax_id"], tax.id)
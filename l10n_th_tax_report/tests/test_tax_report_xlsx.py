@@ -0,0 +1,134 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import xlrd
+
+from odoo.tests.common import SavepointCase
+
+
+class TestTaxReportXlsx(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        type_liability = cls.env.ref("account.data_account_type_current_liabilities")
+        cls.journal = cls.env["account.journal"].search(
+            [("type", "=", "purchase")], limit=1
+        )
+        cls.partner = cls.env.ref("base.res_partner_12")
+        # Names are alike in their first 31 chars, the limit of sheet names
+        cls.taxes = cls.env["account.tax"]
+        for code in ["XA", "XB"]:
+            account = cls.env["account.account"].create(
+                {"name": code, "code": code, "user_type_id": type_liability.id}
+            )
+            cls.taxes |= cls._create_tax(
+                "Purchase VAT 7% of the long tax name {}".format(code), account
+            )
+        date_range_type = cls.env["date.range.type"].create(
+            {"name": "Tax Report Month", "allow_overlap": True}
+        )
+        cls.date_ranges = cls.env["date.range"]
+        for month in ["01", "02"]:
+            cls.date_ranges |= cls.env["date.range"].create(
+                {
+                    "name": "Tax Report 2020-{}".format(month),
+                    "type_id": date_range_type.id,
+                    "date_start": "2020-{}-01".format(month),
+                    "date_end": "2020-{}-28".format(month),
+                }
+            )
+
+    @classmethod
+    def _create_tax(cls, name, account):
+        return cls.env["account.tax"].create(
+            {
+                "name": name,
+                "type_tax_use": "purchase",
+                "amount_type": "percent",
+                "amount": 7.0,
+                "tax_exigibility": "on_invoice",
+                "invoice_repartition_line_ids": [
+                    (0, 0, {"factor_percent": 100.0, "repartition_type": "base"}),
+                    (
+                        0,
+                        0,
+                        {
+                            "factor_percent": 100.0,
+                            "repartition_type": "tax",
+                            "account_id": account.id,
+                        },
+                    ),
+                ],
+            }
+        )
+
+    def _create_bill(self, tax, date, number):
+        account = self.env["account.account"].search(
+            [("user_type_id.internal_group", "=", "expense")], limit=1
+        )
+        bill = self.env["account.move"].create(
+            {
+                "partner_id": self.partner.id,
+                "journal_id": self.journal.id,
+                "type": "in_invoice",
+                "invoice_date": date,
+                "invoice_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "account_id": account.id,
+                            "name": "XLSX",
+                            "quantity": 1.0,
+                            "price_unit": 100.0,
+                            "tax_ids": [(6, 0, [tax.id])],
+                        },
+                    )
+                ],
+            }
+        )
+        bill.tax_invoice_ids.write(
+            {"tax_invoice_number": number, "tax_invoice_date": date}
+        )
+        bill.action_post()
+        return bill
+
+    def test_xlsx_many_taxes_periods(self):
+        """ One sheet for each tax and period, with its own lines only """
+        expected = {}
+        for tax in self.taxes:
+            for date_range in self.date_ranges:
+                number = "XLSX-{}-{}".format(tax.id, date_range.id)
+                self._create_bill(tax, date_range.date_start, number)
+                expected[(tax, date_range)] = number
+        report = self.env["report.tax.report"].create(
+            {
+                "company_id": self.env.company.id,
+                "tax_id": self.taxes[0].id,
+                "date_range_id": self.date_ranges[0].id,
+                "date_from": self.date_ranges[0].date_start,
+                "date_to": self.date_ranges[0].date_end,
+                "tax_ids": [(6, 0, self.taxes.ids)],
+                "date_range_ids": [(6, 0, self.date_ranges.ids)],
+            }
+        )
+        action = report._get_report_action("xlsx")
+        content, _ext = action.render(report.ids)
+        workbook = xlrd.open_workbook(file_contents=content)
+        partitions = report._get_partitions()
+        self.assertEqual(workbook.nsheets, len(partitions))
+        for index, (tax, date_range) in enumerate(partitions, 1):
+            sheet = workbook.sheet_by_index(index - 1)
+            self.assertTrue(sheet.name.startswith("{}. ".format(index)))
+            rows = [
+                row
+                for row in range(sheet.nrows)
+                if str(sheet.cell_value(row, 2)).startswith("XLSX-")
+            ]
+            numbers = [sheet.cell_value(row, 2) for row in rows]
+            self.assertEqual(numbers, [expected.pop((tax, date_range))])
+            # Tax date is written as a date value, not as text
+            self.assertIn(
+                sheet.cell_type(rows[0], 1), [xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE]
+            )
+        self.assertFalse(expected)
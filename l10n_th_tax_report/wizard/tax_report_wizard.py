@@ -1,7 +1,8 @@
 # Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
-from odoo import fields, models
+from odoo import _, fields, models
+from odoo.exceptions import UserError
 from odoo.tools.safe_eval import safe_eval
 
 
@@ -29,6 +30,27 @@ class TaxReportWizard(models.TransientModel):
     date_range_id = fields.Many2one(
         comodel_name="date.range", string="Period", required=True
     )
+    company_ids = fields.Many2many(
+        comodel_name="res.company",
+        string="Other Companies",
+        help="Export XLSX of all companies at once, one background report for "
+        "each company. Taxes are matched by name in each company",
+    )
+    tax_ids = fields.Many2many(
+        comodel_name="account.tax",
+        string="Other Taxes",
+        domain=[
+            ("tax_exigibility", "=", "on_invoice"),
+            ("type_tax_use", "in", ["sale", "purchase"]),
+            ("include_base_amount", "=", False),
+        ],
+        help="Export XLSX only, one worksheet for each tax and period",
+    )
+    date_range_ids = fields.Many2many(
+        comodel_name="date.range",
+        string="Other Periods",
+        help="Export XLSX only, one worksheet for each tax and period",
+    )
 
     def button_export_html(self):
         self.ensure_one()
@@ -54,6 +76,17 @@ class TaxReportWizard(models.TransientModel):
         report_type = "xlsx"
         return self._export(report_type)
 
+    def button_export_background(self):
+        """ Queue report, it is rendered by cron and sent to user when done """
+        self.ensure_one()
+        report_type = self._context.get("report_type", "xlsx")
+        name = "TAX Report - {} - {}".format(
+            self.tax_id.display_name, self.date_range_id.display_name
+        )
+        return self.env["report.async.job"].create_job(
+            "report.tax.report", self._prepare_tax_report(), report_type, name
+        )
+
     def _prepare_tax_report(self):
         self.ensure_one()
         return {
@@ -62,6 +95,69 @@ class TaxReportWizard(models.TransientModel):
             "date_range_id": self.date_range_id.id,
             "date_from": self.date_range_id.date_start,
             "date_to": self.date_range_id.date_end,
+            "tax_ids": [(6, 0, (self.tax_id | self.tax_ids).ids)],
+            "date_range_ids": [(6, 0, (self.date_range_id | self.date_range_ids).ids)],
+        }
+
+    def _prepare_company_tax_report(self, company):
+        """ Same report for other company, taxes are matched by name """
+        self.ensure_one()
+        vals = self._prepare_tax_report()
+        if company == self.company_id:
+            return vals
+        taxes = self.tax_id | self.tax_ids
+        company_taxes = (
+            self.env["account.tax"]
+            .with_context(allowed_company_ids=company.ids)
+            .search(
+                [
+                    ("company_id", "=", company.id),
+                    ("name", "in", taxes.mapped("name")),
+                    ("type_tax_use", "in", taxes.mapped("type_tax_use")),
+                ]
+            )
+        )
+        if not company_taxes:
+            return False
+        main_tax = company_taxes.filtered(lambda l: l.name == self.tax_id.name)
+        vals.update(
+            {
+                "company_id": company.id,
+                "tax_id": (main_tax or company_taxes)[:1].id,
+                "tax_ids": [(6, 0, company_taxes.ids)],
+            }
+        )
+        return vals
+
+    def _prepare_companies_tax_report(self):
+        self.ensure_one()
+        companies = self.company_id | self.company_ids
+        company_vals = [self._prepare_company_tax_report(c) for c in companies]
+        company_vals = [vals for vals in company_vals if vals]
+        if not company_vals:
+            raise UserError(_("No matching tax found in selected companies."))
+        return company_vals
+
+    def button_export_xlsx_companies(self):
+        """ Queue XLSX of each company as its own background job, so they
+        are rendered at the same time by the background report runners """
+        self.ensure_one()
+        Job = self.env["report.async.job"]
+        jobs = Job
+        for vals in self._prepare_companies_tax_report():
+            company = self.env["res.company"].browse(vals["company_id"])
+            name = "TAX Report - {} - {}".format(
+                company.name, self.date_range_id.display_name
+            )
+            jobs |= Job._create_job(
+                "report.tax.report", vals, "xlsx", name, company=company
+            )
+        return {
+            "name": _("Background Reports"),
+            "type": "ir.actions.act_window",
+            "res_model": Job._name,
+            "view_mode": "tree,form",
+            "domain": [("id", "in", jobs.ids)],
         }
 
     def _export(self, report_type):
@@ -1,7 +1,7 @@
 # Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class AccountAccount(models.Model):
@@ -12,3 +12,44 @@ class AccountAccount(models.Model):
         default=False,
         help="If check, this account is for withholding tax",
     )
+
+    @api.model
+    @tools.ormcache("company_id")
+    def _get_company_wt_account_ids(self, company_id):
+        """ Ids of withholding tax accounts of a company, cached until
+        wt_account of any account is changed """
+        accounts = self.sudo().search(
+            [("wt_account", "=", True), ("company_id", "=", company_id)]
+        )
+        return frozenset(accounts.ids)
+
+    @api.model
+    def _get_wt_account_ids(self, companies=None):
+        """ Set of withholding tax account ids of companies (default to
+        current companies), to check account membership in O(1) """
+        companies = companies or self.env.companies
+        wt_account_ids = set()
+        for company in companies:
+            wt_account_ids |= self._get_company_wt_account_ids(company.id)
+        return wt_account_ids
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Clear after, a concurrent read could cache old ids in between
+        if any(vals.get("wt_account") for vals in vals_list):
+            self.clear_caches()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "wt_account" in vals or "company_id" in vals:
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        wt_account = any(self.mapped("wt_account"))
+        res = super().unlink()
+        if wt_account:
+            self.clear_caches()
+        return res
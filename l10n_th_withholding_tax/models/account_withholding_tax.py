@@ -20,6 +20,10 @@ class AccountWithholdingTax(models.Model):
 
     @api.constrains("account_id")
     def _check_account_id(self):
+        Account = self.env["account.account"]
         for rec in self:
-            if rec.account_id and not rec.account_id.wt_account:
+            account = rec.account_id
+            if account and account.id not in Account._get_wt_account_ids(
+                account.company_id
+            ):
                 raise ValidationError(_("Selected account is not for withholding tax"))
@@ -171,3 +171,14 @@ class TestWithholdingTax(SavepointCase):
         self.assertTrue(wt_tax_id)
         self.assertEqual(wt_tax_id.account_id, self.wt_account.account_id)
         invoice_id.action_post()
+
+    def test_04_wt_account_registry(self):
+        """ Cached WHT accounts follow changes of wt_account """
+        Account = self.env["account.account"]
+        company = self.a_expense.company_id
+        self.assertNotIn(self.a_expense.id, Account._get_wt_account_ids(company))
+        self.a_expense.wt_account = True
+        self.assertIn(self.a_expense.id, Account._get_wt_account_ids(company))
+        self.a_expense.wt_account = False
+        self.assertNotIn(self.a_expense.id, Account._get_wt_account_ids(company))
+        self.assertIn(self.wt_account.account_id.id, Account._get_wt_account_ids())
@@ -3,7 +3,7 @@
 
 {
     "name": "Thai Localization - Withholding Tax Certificate",
-    "version": "13.0.2.1.0",
+    "version": "13.0.2.2.0",
     "author": "Ecosoft, Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/l10n-thailand",
@@ -12,10 +12,12 @@
     "data": [
         "security/account_security.xml",
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "wizard/create_withholding_tax_cert.xml",
         "views/withholding_tax_cert.xml",
         "views/account_payment_view.xml",
         "views/account_move_view.xml",
+        "views/account_withholding_tax_view.xml",
     ],
     "installable": True,
     "development_status": "Beta",
@@ -4,3 +4,4 @@
 from . import withholding_tax_cert
 from . import account_payment
 from . import account_move
+from . import account_withholding_tax
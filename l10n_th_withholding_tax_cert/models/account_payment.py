@@ -14,6 +14,10 @@ class AccountPayment(models.Model):
         readonly=True,
     )
 
+    wt_cert_pending = fields.Boolean(
+        copy=False,
+        help="Withholding tax cert. will be created in background",
+    )
     wt_cert_cancel = fields.Boolean(
         compute="_compute_wt_cert_cancel",
         store=True,
@@ -29,6 +33,26 @@ class AccountPayment(models.Model):
                 wt_cancel = True
             record.wt_cert_cancel = wt_cancel
 
+    def post(self):
+        res = super().post()
+        self._queue_wt_cert()
+        return res
+
+    def _queue_wt_cert(self):
+        """ Payments with withholding tax set to auto create cert., are queued
+        for the cron job, so cert. creation is not part of the posting """
+        Account = self.env["account.account"]
+        payments = self.env["account.payment"]
+        for payment in self:
+            wt_account_ids = Account._get_wt_account_ids(payment.company_id)
+            wt_taxes = payment.move_line_ids.filtered(
+                lambda l: l.account_id.id in wt_account_ids
+            ).mapped("wt_tax_id")
+            if any(wt_taxes.mapped("auto_create_wt_cert")):
+                payments |= payment
+        if payments:
+            payments.write({"wt_cert_pending": True})
+
     def button_wt_certs(self):
         return {
             "name": _("Withholding Tax Certs."),
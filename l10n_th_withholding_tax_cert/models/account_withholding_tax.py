@@ -0,0 +1,36 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import _, api, fields, models
+from odoo.exceptions import ValidationError
+
+from .withholding_tax_cert import INCOME_TAX_FORM, WHT_CERT_INCOME_TYPE
+
+
+class AccountWithholdingTax(models.Model):
+    _inherit = "account.withholding.tax"
+
+    income_tax_form = fields.Selection(
+        selection=INCOME_TAX_FORM, string="Income Tax Form"
+    )
+    wt_cert_income_type = fields.Selection(
+        selection=WHT_CERT_INCOME_TYPE, string="Type of Income"
+    )
+    auto_create_wt_cert = fields.Boolean(
+        string="Auto Create WHT Cert.",
+        help="When payment with this withholding tax is posted, "
+        "its withholding tax cert. is created in background",
+    )
+
+    @api.constrains("auto_create_wt_cert", "income_tax_form", "wt_cert_income_type")
+    def _check_auto_create_wt_cert(self):
+        for rec in self:
+            if rec.auto_create_wt_cert and not (
+                rec.income_tax_form and rec.wt_cert_income_type
+            ):
+                raise ValidationError(
+                    _(
+                        "Income Tax Form and Type of Income are required "
+                        "to auto create withholding tax cert."
+                    )
+                )
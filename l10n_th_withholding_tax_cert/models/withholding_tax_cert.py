@@ -1,10 +1,17 @@
 # Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+import logging
+import threading
+
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
 from odoo.tools.float_utils import float_compare
 
+_logger = logging.getLogger(__name__)
+
+WT_CERT_BATCH_SIZE = 100
+
 INCOME_TAX_FORM = [
     ("pnd1", "PND1"),
     ("pnd3", "PND3"),
@@ -191,40 +198,58 @@ class WithholdingTaxCert(models.Model):
     @api.depends("payment_id", "move_id")
     def _compute_wt_cert_data(self):
         wt_account_ids = self._context.get("wt_account_ids", [])
-        wt_ref_id = self._context.get("wt_ref_id", False)
-        income_tax_form = self._context.get("income_tax_form", False)
         CertLine = self.env["withholding.tax.cert.line"]
-        Cert = self.env["withholding.tax.cert"]
         if wt_account_ids:
-            wt_reference = Cert.browse(wt_ref_id)
+            # Hook to find wt move lines, of all certs at once
+            wt_move_lines_map = self._get_wt_move_lines_map(
+                self.mapped("payment_id"), self.mapped("move_id"), wt_account_ids
+            )
             for record in self:
-                # Hook to find wt move lines
-                wt_move_lines = record._get_wt_move_line(
-                    record.payment_id, record.move_id, wt_account_ids
+                wt_move_lines = wt_move_lines_map.get(
+                    record.payment_id or record.move_id,
+                    self.env["account.move.line"],
                 )
-                partner_id = record.payment_id.partner_id or record.move_id.partner_id
-                # WHT from journal entry, use partner from line.
-                if record.move_id and record.move_id.type == "entry":
-                    partner = wt_move_lines.mapped("partner_id")
-                    if len(partner) == 1:
-                        partner_id = wt_move_lines[0].partner_id
                 record.update(
-                    {
-                        "name": record.payment_id.name or record.move_id.name,
-                        "date": record.payment_id.payment_date or record.move_id.date,
-                        "ref_wt_cert_id": wt_reference or False,
-                        "supplier_partner_id": partner_id,
-                        "income_tax_form": income_tax_form,
-                    }
+                    record._prepare_wt_cert_vals(
+                        record.payment_id, record.move_id, wt_move_lines
+                    )
                 )
                 for line in wt_move_lines:
                     record.wt_line += CertLine.new(record._prepare_wt_line(line))
 
+    @api.model
+    def _prepare_wt_cert_vals(self, payment, move, wt_move_lines):
+        """ Hook point to prepare cert data (without wt_line) from its payment
+        or journal entry and wt move lines """
+        partner = payment.partner_id or move.partner_id
+        # WHT from journal entry, use partner from line.
+        if move and move.type == "entry":
+            line_partner = wt_move_lines.mapped("partner_id")
+            if len(line_partner) == 1:
+                partner = line_partner
+        return {
+            "name": payment.name or move.name,
+            "date": payment.payment_date or move.date,
+            "ref_wt_cert_id": self._context.get("wt_ref_id", False),
+            "supplier_partner_id": partner.id,
+            "income_tax_form": self._context.get("income_tax_form")
+            or self._get_default_income_tax_form(wt_move_lines),
+        }
+
+    @api.model
+    def _get_default_income_tax_form(self, wt_move_lines):
+        """ Income tax form as set on withholding tax of wt move lines """
+        forms = wt_move_lines.mapped("wt_tax_id").filtered("income_tax_form")
+        return forms[:1].income_tax_form
+
     @api.model
     def _prepare_wt_line(self, move_line):
         """ Hook point to prepare wt_line """
         wt_percent = move_line.wt_tax_id.amount
-        wt_cert_income_type = self._context.get("wt_cert_income_type")
+        wt_cert_income_type = (
+            self._context.get("wt_cert_income_type")
+            or move_line.wt_tax_id.wt_cert_income_type
+        )
         select_dict = dict(WHT_CERT_INCOME_TYPE)
         wt_cert_income_desc = select_dict.get(wt_cert_income_type, False)
         vals = {
@@ -240,18 +265,151 @@ class WithholdingTaxCert(models.Model):
         return vals
 
     @api.model
-    def _get_wt_move_line(self, payment, move, wt_account_ids):
-        """ Hook point to get wt_move_lines """
-        wt_move_lines = []
-        if payment:
-            wt_move_lines = payment.move_line_ids.filtered(
-                lambda l: l.account_id.id in wt_account_ids
+    def _prepare_wt_cert_multi_vals(
+        self, payments, moves, wt_move_lines_map, ref_wt_cert=False
+    ):
+        """ Values to create certs of many payments and journal entries,
+        ref_wt_cert is the cert substituted by the new certs """
+        MoveLine = self.env["account.move.line"]
+        sources = [(payment, moves.browse()) for payment in payments]
+        sources += [(payments.browse(), move) for move in moves]
+        vals_list = []
+        for payment, move in sources:
+            lines = wt_move_lines_map.get(payment or move, MoveLine)
+            vals = self._prepare_wt_cert_vals(payment, move, lines)
+            if ref_wt_cert:
+                vals["ref_wt_cert_id"] = ref_wt_cert.id
+            vals.update(
+                {
+                    "payment_id": payment.id,
+                    "move_id": move.id,
+                    "wt_line": [(0, 0, self._prepare_wt_line(line)) for line in lines],
+                }
             )
-        elif move:
-            wt_move_lines = move.line_ids.filtered(
-                lambda l: l.account_id.id in wt_account_ids
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def _create_pending_wt_cert(self, payments):
+        """ Create certs of payments queued on posting, in one create() """
+        Account = self.env["account.account"]
+        wt_account_ids = Account._get_wt_account_ids(payments.mapped("company_id"))
+        wt_move_lines_map = self._get_wt_move_lines_map(
+            payments, self.env["account.move"], list(wt_account_ids)
+        )
+        # Skip payments cancelled or already with cert since queued
+        payments = payments.filtered(
+            lambda l: l.state == "posted"
+            and l.wt_cert_cancel
+            and wt_move_lines_map.get(l)
+        )
+        vals_list = self._prepare_wt_cert_multi_vals(
+            payments, self.env["account.move"], wt_move_lines_map
+        )
+        for payment, vals in zip(payments, vals_list):
+            vals.update(
+                {
+                    "company_id": payment.company_id.id,
+                    "company_partner_id": payment.company_id.partner_id.id,
+                }
             )
-        return wt_move_lines
+        return self.with_context(tracking_disable=True).create(vals_list)
+
+    @api.model
+    def _create_pending_wt_cert_batch(self, payments):
+        """ Create certs of queued payments without stopping at the first error,
+        payments that fail are logged and removed from the queue """
+        try:
+            with self.env.cr.savepoint():
+                certs = self._create_pending_wt_cert(payments)
+                self.flush()
+            payments.write({"wt_cert_pending": False})
+            return certs
+        except Exception:
+            self.env.clear()
+        # Some payments fail, create one by one to find out which ones
+        certs = self.browse()
+        for payment in payments:
+            try:
+                with self.env.cr.savepoint():
+                    certs |= self._create_pending_wt_cert(payment)
+                    self.flush()
+            except Exception:
+                self.env.clear()
+                _logger.exception(
+                    "Withholding tax cert of payment %s not created", payment.id
+                )
+            payment.write({"wt_cert_pending": False})
+        return certs
+
+    @api.model
+    def _cron_create_pending_wt_cert(self, batch_size=WT_CERT_BATCH_SIZE):
+        """ Create certs of payments queued on posting, batch by batch """
+        Payment = self.env["account.payment"]
+        while True:
+            payments = Payment.search(
+                [("wt_cert_pending", "=", True)], limit=batch_size, order="id"
+            )
+            if not payments:
+                break
+            certs = self._create_pending_wt_cert_batch(payments)
+            _logger.info("%s withholding tax certs created", len(certs))
+            # Each batch keep its own result, even if next batch fails
+            if not getattr(threading.currentThread(), "testing", False):
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+        return True
+
+    @api.model
+    def _get_wt_move_lines_map(self, payments, moves, wt_account_ids):
+        """ Return {payment or move: wt_move_lines}, with one query by
+        _get_wt_move_lines(). When the per record hook _get_wt_move_line()
+        is overridden, it is called for each payment and move instead, so
+        existing overrides keep working """
+        if type(self)._get_wt_move_line is WithholdingTaxCert._get_wt_move_line:
+            return self._get_wt_move_lines(payments, moves, wt_account_ids)
+        wt_move_lines_map = {}
+        for payment in payments:
+            wt_move_lines_map[payment] = self._get_wt_move_line(
+                payment, moves.browse(), wt_account_ids
+            )
+        for move in moves:
+            wt_move_lines_map[move] = self._get_wt_move_line(
+                payments.browse(), move, wt_account_ids
+            )
+        return wt_move_lines_map
+
+    @api.model
+    def _get_wt_move_line(self, payment, move, wt_account_ids):
+        """ Hook point to get wt_move_lines of one payment or move,
+        prefer to override _get_wt_move_lines() """
+        wt_move_lines_map = self._get_wt_move_lines(payment, move, wt_account_ids)
+        return wt_move_lines_map.get(payment or move, self.env["account.move.line"])
+
+    @api.model
+    def _get_wt_move_lines(self, payments, moves, wt_account_ids):
+        """ Hook point to get wt_move_lines of many payments and moves with
+        one query, return {payment or move: wt_move_lines} """
+        MoveLine = self.env["account.move.line"]
+        if not wt_account_ids or not (payments or moves):
+            return {}
+        wt_move_lines = MoveLine.search(
+            [
+                ("account_id", "in", wt_account_ids),
+                "|",
+                ("payment_id", "in", payments.ids),
+                ("move_id", "in", moves.ids),
+            ]
+        )
+        # Membership of recordsets is linear, test ids against sets instead
+        payment_ids = set(payments.ids)
+        move_ids = set(moves.ids)
+        line_ids = {}
+        for line in wt_move_lines:
+            if line.payment_id.id in payment_ids:
+                line_ids.setdefault(line.payment_id, []).append(line.id)
+            if line.move_id.id in move_ids:
+                line_ids.setdefault(line.move_id, []).append(line.id)
+        return {record: MoveLine.browse(ids) for record, ids in line_ids.items()}
 
     def action_draft(self):
         self.write({"state": "draft"})
@@ -1,6 +1,8 @@
 # Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+from unittest import mock
+
 from odoo import tools
 from odoo.exceptions import UserError
 from odoo.modules.module import get_resource_path
@@ -226,6 +228,9 @@ class TestWTCert(SavepointCase):
         res = wizard.create_wt_cert_multi()
         certs = self.wt_cert.search(res["domain"])
         self.assertEqual(len(certs), 2)
+        self.assertEqual(certs.mapped("payment_id"), payment | payment2)
+        # Created in batch, without chatter messages
+        self.assertFalse(certs.mapped("message_ids"))
         for cert in certs:
             self.assertEqual(cert.wt_line.amount, 3)
 
@@ -266,3 +271,154 @@ class TestWTCert(SavepointCase):
         self.assertEqual(len(certs), 2)
         for cert in certs:
             self.assertEqual(cert.wt_line.amount, 3)
+
+    def test_05_auto_create_wt_cert(self):
+        """ Payment with auto withholding tax is queued on posting,
+        its cert is created in background from withholding tax config """
+        wt_tax = self.browse_ref("l10n_th_withholding_tax.account_withholding_tax_data")
+        wt_tax.write(
+            {
+                "income_tax_form": "pnd3",
+                "wt_cert_income_type": "2",
+                "auto_create_wt_cert": True,
+            }
+        )
+        expenses_journal = self.browse_ref("account.expenses_journal")
+        invoice = self._create_invoice(
+            self.partner_1.id, expenses_journal.id, "in_invoice"
+        )
+        invoice.action_post()
+        ctx = {
+            "active_ids": [invoice.id],
+            "active_id": invoice.id,
+            "active_model": "account.move",
+        }
+        view_id = "account.view_account_payment_invoice_form"
+        with Form(self.account_payment.with_context(ctx), view=view_id) as f:
+            f.journal_id = self.browse_ref("account.bank_journal")
+            f.amount = 97.0  # To withhold 3.0
+            f.payment_difference_handling = "reconcile"
+            f.wt_tax_id = wt_tax
+        payment = f.save()
+        payment.post()
+        self.assertTrue(payment.wt_cert_pending)
+        self.assertFalse(payment.wt_cert_ids)
+        cert = self.wt_cert._create_pending_wt_cert(payment)
+        self.assertEqual(cert.payment_id, payment)
+        self.assertEqual(cert.income_tax_form, "pnd3")
+        self.assertEqual(cert.wt_line.wt_cert_income_type, "2")
+        self.assertEqual(cert.wt_line.amount, 3)
+
+    def test_06_auto_create_wt_cert_failure(self):
+        """ Payment that can not get its cert is logged and removed from queue,
+        it does not block certs of other payments """
+        wt_tax = self.browse_ref("l10n_th_withholding_tax.account_withholding_tax_data")
+        wt_tax.write(
+            {
+                "income_tax_form": "pnd3",
+                "wt_cert_income_type": "2",
+                "auto_create_wt_cert": True,
+            }
+        )
+        expenses_journal = self.browse_ref("account.expenses_journal")
+        payments = self.account_payment
+        for _i in range(2):
+            invoice = self._create_invoice(
+                self.partner_1.id, expenses_journal.id, "in_invoice"
+            )
+            invoice.action_post()
+            ctx = {
+                "active_ids": [invoice.id],
+                "active_id": invoice.id,
+                "active_model": "account.move",
+            }
+            view_id = "account.view_account_payment_invoice_form"
+            with Form(self.account_payment.with_context(ctx), view=view_id) as f:
+                f.journal_id = self.browse_ref("account.bank_journal")
+                f.amount = 97.0  # To withhold 3.0
+                f.payment_difference_handling = "reconcile"
+                f.wt_tax_id = wt_tax
+            payment = f.save()
+            payment.post()
+            payments |= payment
+        self.assertTrue(all(payments.mapped("wt_cert_pending")))
+        # First payment has lost its partner, cert supplier is required
+        payments.flush()
+        self.env.cr.execute(
+            "update account_payment set partner_id = null where id = %s",
+            (payments[0].id,),
+        )
+        payments.invalidate_cache()
+        self.wt_cert._cron_create_pending_wt_cert()
+        self.assertFalse(payments[0].wt_cert_ids)
+        self.assertEqual(len(payments[1].wt_cert_ids), 1)
+        self.assertFalse(any(payments.mapped("wt_cert_pending")))
+
+    def test_07_create_wt_cert_multi_hook_override(self):
+        """ Overrides of _get_wt_move_line() are still called for each payment """
+        expenses_journal = self.browse_ref("account.expenses_journal")
+        invoice = self._create_invoice(
+            self.partner_1.id, expenses_journal.id, "in_invoice"
+        )
+        invoice2 = invoice.copy()
+        invoice.action_post()
+        invoice2.action_post()
+        payment = self._register_payment(invoice)
+        payment2 = self._register_payment(invoice2)
+        ctx = {
+            "active_ids": [payment.id, payment2.id],
+            "active_model": "account.payment",
+        }
+        wizard = (
+            self.env["create.withholding.tax.cert"]
+            .with_context(ctx)
+            .create(
+                {
+                    "income_tax_form": "pnd3",
+                    "wt_cert_income_type": "1",
+                    "wt_account_ids": [(6, 0, [self.wt_account.id])],
+                }
+            )
+        )
+        Cert = type(self.wt_cert)
+        with mock.patch.object(
+            Cert,
+            "_get_wt_move_line",
+            autospec=True,
+            side_effect=Cert._get_wt_move_line,
+        ) as hook:
+            res = wizard.create_wt_cert_multi()
+        self.assertEqual(hook.call_count, 2)
+        certs = self.wt_cert.search(res["domain"])
+        self.assertEqual(certs.mapped("payment_id"), payment | payment2)
+        for cert in certs:
+            self.assertEqual(cert.wt_line.amount, 3)
+
+    def test_08_create_wt_cert_multi_substitute(self):
+        """ Substitute WT Cert with certs created from many payments """
+        expenses_journal = self.browse_ref("account.expenses_journal")
+        invoice = self._create_invoice(
+            self.partner_1.id, expenses_journal.id, "in_invoice"
+        )
+        invoice.action_post()
+        payment = self._register_payment(invoice)
+        ctx = {"active_ids": [payment.id], "active_model": "account.payment"}
+        Wizard = self.env["create.withholding.tax.cert"].with_context(ctx)
+        vals = {
+            "income_tax_form": "pnd3",
+            "wt_cert_income_type": "1",
+            "wt_account_ids": [(6, 0, [self.wt_account.id])],
+        }
+        res = Wizard.create(vals).create_wt_cert_multi()
+        cert = self.wt_cert.search(res["domain"])
+        self.assertFalse(cert.ref_wt_cert_id)
+        cert.action_done()
+        # substitute WT Cert
+        vals.update({"substitute": True, "wt_cert_id": cert.id})
+        res = Wizard.create(vals).create_wt_cert_multi()
+        cert2 = self.wt_cert.search(res["domain"])
+        self.assertEqual(len(cert2), 1)
+        self.assertEqual(cert2.ref_wt_cert_id, cert)
+        cert2.action_done()
+        self.assertEqual(cert2.state, "done")
+        self.assertEqual(cert.state, "cancel")
@@ -16,8 +16,8 @@ class CreateWithholdingTaxCert(models.TransientModel):
         string="Withholing Tax Accounts",
         required=True,
         help="If accounts are specified, system will auto fill tax amount",
-        default=lambda self: self.env["account.account"].search(
-            [("wt_account", "=", True)]
+        default=lambda self: self.env["account.account"].browse(
+            sorted(self.env["account.account"]._get_wt_account_ids())
         ),
     )
     substitute = fields.Boolean(string="Substitute")
@@ -108,25 +108,43 @@ class CreateWithholdingTaxCert(models.TransientModel):
         }
 
     def create_wt_cert_multi(self):
-        ctx = self._context.copy()
-        active_ids = ctx.get("active_ids")
-        Cert = self.env["withholding.tax.cert"]
-        cert_ids = []
-        for active_id in active_ids:
-            ctx.update(
-                {"active_id": active_id, "active_ids": [active_id]}
-            )  # Mock single cert.
-            res = self.with_context(ctx).create_wt_cert()
-            # Create new withholding.tax.cert
-            cert = Cert.with_context(res["context"]).new()
-            cert._compute_wt_cert_data()
-            new_cert = Cert.create(cert._convert_to_write(cert._cache))
-            cert_ids.append(new_cert.id)
+        """ Create certs of all selected payments or journal entries at once,
+        wt move lines are searched together and certs are created in one
+        call, without tracking and chatter messages """
+        self.ensure_one()
+        model = self._context.get("active_model", False)
+        records = self.env[model].browse(self._context.get("active_ids", []))
+        Cert = self.env["withholding.tax.cert"].with_context(
+            income_tax_form=self.income_tax_form,
+            wt_cert_income_type=self.wt_cert_income_type,
+        )
+        payments = self.env["account.payment"]
+        moves = self.env["account.move"]
+        if model == "account.payment":
+            payments = records
+        else:
+            moves = records
+        wt_move_lines_map = Cert._get_wt_move_lines_map(
+            payments, moves, self.wt_account_ids.ids
+        )
+        if payments.filtered(lambda l: not wt_move_lines_map.get(l)):
+            raise UserError(
+                _(
+                    "Can not create withholding tax cert. Selected account "
+                    "does not match with Journal Items."
+                )
+            )
+        # Substitute WT Cert
+        ref_wt_cert = self.substitute and self.wt_cert_id
+        vals_list = Cert._prepare_wt_cert_multi_vals(
+            payments, moves, wt_move_lines_map, ref_wt_cert=ref_wt_cert
+        )
+        certs = Cert.with_context(tracking_disable=True).create(vals_list)
         return {
             "name": _("Create Multi Withholding Tax Cert."),
             "view_mode": "tree,form",
             "res_model": "withholding.tax.cert",
             "view_id": False,
             "type": "ir.actions.act_window",
-            "domain": [("id", "in", cert_ids)],
+            "domain": [("id", "in", certs.ids)],
         }
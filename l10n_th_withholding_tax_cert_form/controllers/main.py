@@ -0,0 +1,29 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import fields, http
+from odoo.http import content_disposition, request
+
+
+class WithholdingTaxCertController(http.Controller):
+    @http.route(
+        "/l10n_th_withholding_tax_cert_form/batch_pdf", type="http", auth="user"
+    )
+    def wt_cert_batch_pdf(self, ids, **kwargs):
+        """ Stream the batch pdf of certificates, nothing is stored.
+        Certificates are read with access rights of the current user """
+        certs = request.env["withholding.tax.cert"].browse(
+            [int(cert_id) for cert_id in ids.split(",") if cert_id]
+        )
+        certs.check_access_rights("read")
+        certs.check_access_rule("read")
+        pdf, _ext = certs._render_wt_cert_pdf_batch()
+        filename = "WT Certificates - {}.pdf".format(fields.Date.today())
+        return request.make_response(
+            pdf,
+            headers=[
+                ("Content-Type", "application/pdf"),
+                ("Content-Length", len(pdf)),
+                ("Content-Disposition", content_disposition(filename)),
+            ],
+        )
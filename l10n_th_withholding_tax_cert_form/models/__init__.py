@@ -1,3 +1,4 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+from . import ir_actions_report
 from . import withholding_tax_cert
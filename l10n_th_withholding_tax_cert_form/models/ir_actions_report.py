@@ -0,0 +1,148 @@
+# Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import _, models, tools
+from odoo.exceptions import UserError
+from odoo.tools.pdf import merge_pdf
+
+from odoo.addons.base.models.ir_actions_report import _get_wkhtmltopdf_bin
+
+_logger = logging.getLogger(__name__)
+
+# Number of documents printed by one wkhtmltopdf process
+PDF_BATCH_CHUNK_SIZE = 50
+# Default number of wkhtmltopdf processes run at the same time
+DEFAULT_MAX_WORKERS = 4
+
+
+def _run_wkhtmltopdf_chunk(command_args, bodies, header=None, footer=None):
+    """ Print bodies with one wkhtmltopdf process, return pdf content.
+    Run in worker threads, so no ORM access here """
+    with tempfile.TemporaryDirectory(prefix="report.batch.") as tmp_dir:
+        command_args = list(command_args)
+        for option, html in (("--header-html", header), ("--footer-html", footer)):
+            if html:
+                path = os.path.join(tmp_dir, option.strip("-") + ".html")
+                with open(path, "wb") as html_file:
+                    html_file.write(html)
+                command_args.extend([option, path])
+        paths = []
+        for i, body in enumerate(bodies):
+            path = os.path.join(tmp_dir, "body-%05d.html" % i)
+            with open(path, "wb") as body_file:
+                body_file.write(body)
+            paths.append(path)
+        pdf_path = os.path.join(tmp_dir, "report.pdf")
+        process = subprocess.Popen(
+            [_get_wkhtmltopdf_bin()] + command_args + paths + [pdf_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        _out, err = process.communicate()
+        if process.returncode not in [0, 1]:
+            raise UserError(
+                _("Wkhtmltopdf failed (error code: %s). Message: %s")
+                % (process.returncode, err[-1000:])
+            )
+        with open(pdf_path, "rb") as pdf_file:
+            return pdf_file.read()
+
+
+class IrActionsReport(models.Model):
+    _inherit = "ir.actions.report"
+
+    def _render_qweb_pdf_batch(self, res_ids, data=None, allowed_paths=None):
+        """ Print many documents in one pdf, faster than render_qweb_pdf.
+
+        HTML of all documents is rendered once, so assets are resolved once
+        for the whole batch. Documents are then split in chunks, each printed
+        by its own wkhtmltopdf process, run in parallel, and merged in order.
+        allowed_paths are local folders wkhtmltopdf may read files from.
+
+        render_qweb_pdf() can not print a chunk, as worker threads have no
+        ORM access, so its steps _prepare_html() and _build_wkhtmltopdf_args()
+        are used directly, check them when upgrading Odoo """
+        self.ensure_one()
+        if tools.config["test_enable"] and not self.env.context.get(
+            "force_report_rendering"
+        ):
+            return self.render_qweb_html(res_ids, data=data)
+        if self.get_wkhtmltopdf_state() == "install":
+            raise UserError(
+                _(
+                    "Unable to find Wkhtmltopdf on this system. "
+                    "The PDF can not be created."
+                )
+            )
+        start = time.time()
+        name = self.name
+        context = dict(self.env.context, debug=False, commit_assetsbundle=True)
+        report = self.with_context(context)
+        html = report.render_qweb_html(res_ids, data=data)[0]
+        bodies, _ids, header, footer, paperformat_args = report._prepare_html(html)
+        command_args = report._build_wkhtmltopdf_args(
+            report.get_paperformat(),
+            context.get("landscape"),
+            specific_paperformat_args=paperformat_args,
+            set_viewport_size=context.get("set_viewport_size"),
+        )
+        for path in allowed_paths or []:
+            command_args.extend(["--allow", path])
+        _logger.info(
+            "%s: HTML of %s documents rendered in %.2fs",
+            name,
+            len(bodies),
+            time.time() - start,
+        )
+        chunk_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "l10n_th_withholding_tax_cert_form.pdf_batch_chunk_size",
+                PDF_BATCH_CHUNK_SIZE,
+            )
+        )
+        max_workers = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "l10n_th_withholding_tax_cert_form.pdf_batch_max_workers",
+                DEFAULT_MAX_WORKERS,
+            )
+        )
+        chunks = [
+            bodies[i : i + chunk_size] for i in range(0, len(bodies), chunk_size)
+        ]
+
+        def print_chunk(chunk):
+            chunk_start = time.time()
+            pdf = _run_wkhtmltopdf_chunk(command_args, chunk, header, footer)
+            elapsed = time.time() - chunk_start
+            _logger.info(
+                "%s: %s documents printed in %.2fs (%.3fs per document)",
+                name,
+                len(chunk),
+                elapsed,
+                elapsed / len(chunk),
+            )
+            return pdf
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pdfs = list(executor.map(print_chunk, chunks))
+        pdf = pdfs[0] if len(pdfs) == 1 else merge_pdf(pdfs)
+        elapsed = time.time() - start
+        _logger.info(
+            "%s: %s documents in %.2fs (%.3fs per document)",
+            name,
+            len(bodies),
+            elapsed,
+            elapsed / (len(bodies) or 1),
+        )
+        return pdf, "pdf"
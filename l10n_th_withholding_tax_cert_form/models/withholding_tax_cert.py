@@ -1,7 +1,14 @@
 # Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+import os
+
 from odoo import models
+from odoo.modules.module import get_resource_path
+
+WT_CERT_BACKGROUND = get_resource_path(
+    "l10n_th_withholding_tax_cert_form", "static", "src", "img", "WithholdingCert.jpg"
+)
 
 
 class WithholdingTaxCert(models.Model):
@@ -23,3 +30,26 @@ class WithholdingTaxCert(models.Model):
             lazy=False,
         )
         return groups
+
+    def _render_wt_cert_pdf_batch(self):
+        """ Print all certificates in one pdf, in parallel chunks.
+        Background image is read by wkhtmltopdf from the module folder,
+        instead of being downloaded from the server for each certificate """
+        report = self.env.ref(
+            "l10n_th_withholding_tax_cert_form.withholding_tax_pdf_report"
+        )
+        return report._render_qweb_pdf_batch(
+            self.ids,
+            data={"wt_cert_background": "file://{}".format(WT_CERT_BACKGROUND)},
+            allowed_paths=[os.path.dirname(WT_CERT_BACKGROUND)],
+        )
+
+    def action_print_wt_cert_batch(self):
+        """ Download the batch pdf, rendered by the controller """
+        return {
+            "type": "ir.actions.act_url",
+            "url": "/l10n_th_withholding_tax_cert_form/batch_pdf?ids={}".format(
+                ",".join(str(cert_id) for cert_id in self.ids)
+            ),
+            "target": "self",
+        }
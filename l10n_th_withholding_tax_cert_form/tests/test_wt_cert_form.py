@@ -1,9 +1,16 @@
 # Copyright 2020 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+import io
+from unittest import mock
+
+from PyPDF2 import PdfFileReader, PdfFileWriter
+
 from odoo import fields
 from odoo.tests.common import SingleTransactionCase
 
+from odoo.addons.l10n_th_withholding_tax_cert_form.models import ir_actions_report
+
 
 class TestWTCertForm(SingleTransactionCase):
     @classmethod
@@ -41,3 +48,68 @@ class TestWTCertForm(SingleTransactionCase):
     def test_01_print_wt_cert_form(self):
         wt_cert = self._create_direct_wt_cert()
         self.withholdin_tax_cert_form.render_qweb_pdf(wt_cert.id)
+
+    def test_02_print_wt_cert_form_batch(self):
+        wt_certs = self._create_direct_wt_cert() | self._create_direct_wt_cert()
+        html = wt_certs._render_wt_cert_pdf_batch()[0]
+        # Background is read from local file, for each certificate
+        self.assertEqual(html.count(b"file://"), 2)
+        # Pdf is streamed by the controller, no attachment is stored
+        attachments = self.env["ir.attachment"].search_count([])
+        action = wt_certs.action_print_wt_cert_batch()
+        self.assertEqual(action["type"], "ir.actions.act_url")
+        self.assertTrue(
+            action["url"].endswith("ids={},{}".format(wt_certs[0].id, wt_certs[1].id))
+        )
+        self.assertEqual(self.env["ir.attachment"].search_count([]), attachments)
+
+    def test_03_print_wt_cert_form_batch_chunks(self):
+        """ Certificates are printed by chunks, merged back in order """
+        wt_certs = self.wt_cert
+        for _i in range(5):
+            wt_certs |= self._create_direct_wt_cert()
+        self.env["ir.config_parameter"].sudo().set_param(
+            "l10n_th_withholding_tax_cert_form.pdf_batch_chunk_size", 2
+        )
+        Report = type(self.withholdin_tax_cert_form)
+        bodies_order = []
+        chunks = []
+
+        def prepare_html(report, html):
+            res = prepare_html_origin(report, html)
+            bodies_order.extend(res[0])
+            return res
+
+        def run_wkhtmltopdf_chunk(command_args, bodies, header=None, footer=None):
+            # One page per document, its width is the document position
+            chunks.append(len(bodies))
+            writer = PdfFileWriter()
+            for body in bodies:
+                position = [id(b) for b in bodies_order].index(id(body))
+                writer.addBlankPage(width=100 + position, height=100)
+            pdf = io.BytesIO()
+            writer.write(pdf)
+            return pdf.getvalue()
+
+        prepare_html_origin = Report._prepare_html
+        with mock.patch.object(
+            Report, "get_wkhtmltopdf_state", return_value="ok"
+        ), mock.patch.object(
+            Report, "_prepare_html", autospec=True, side_effect=prepare_html
+        ), mock.patch.object(
+            ir_actions_report,
+            "_run_wkhtmltopdf_chunk",
+            side_effect=run_wkhtmltopdf_chunk,
+        ):
+            pdf, ext = wt_certs.with_context(
+                force_report_rendering=True
+            )._render_wt_cert_pdf_batch()
+        self.assertEqual(ext, "pdf")
+        self.assertEqual(len(bodies_order), 5)
+        self.assertEqual(sorted(chunks), [1, 2, 2])
+        reader = PdfFileReader(io.BytesIO(pdf))
+        widths = [
+            int(reader.getPage(i).mediaBox.getWidth())
+            for i in range(reader.getNumPages())
+        ]
+        self.assertEqual(widths, [100, 101, 102, 103, 104])
@@ -14,6 +14,7 @@
         "date_range",
         "l10n_th_partner",
         "l10n_th_withholding_tax_cert",
+        "l10n_th_report_async",
     ],
     "data": [
         "data/paper_format.xml",
@@ -89,19 +89,22 @@ class WithHoldingTaxReport(models.TransientModel):
         pnd = INCOME_TAX_FORM[pnd]
         return pnd
 
-    def print_report(self, report_type="qweb"):
-        self.ensure_one()
+    def _get_report_action(self, report_type):
         if report_type == "xlsx":
             report_name = "withholding.tax.report.xlsx"
         elif report_type == "qweb-text":
             report_name = "l10n_th_withholding_tax_report.report_withholding_tax_text"
         else:
             report_name = "l10n_th_withholding_tax_report.report_withholding_tax_qweb"
-        context = dict(self._context)
-        action = self.env["ir.actions.report"].search(
+        return self.env["ir.actions.report"].search(
             [("report_name", "=", report_name), ("report_type", "=", report_type)],
             limit=1,
         )
+
+    def print_report(self, report_type="qweb"):
+        self.ensure_one()
+        context = dict(self._context)
+        action = self._get_report_action(report_type)
         return action.with_context(context).report_action(self, config=False)
 
     def _get_html(self):
@@ -67,3 +67,16 @@ class TestWithholdingTaxReport(SavepointCase):
         report = self.report
         self.assertEqual(report.report_type, "xlsx")
         report.render_xlsx(withholding_tax_report.id, None)
+
+    def test_04_background_report(self):
+        date_range = self.browse_ref("l10n_th_withholding_tax_report.date_range_test")
+        wizard = self.wizard.create(
+            {"income_tax_form": "pnd3", "date_range_id": date_range.id}
+        )
+        action = wizard.with_context(report_type="xlsx").button_export_background()
+        job = self.env["report.async.job"].browse(action["res_id"])
+        self.assertEqual(job.state, "queued")
+        job._run()
+        self.assertEqual(job.state, "done")
+        self.assertTrue(job.attachment_id)
+        self.assertTrue(job.date_done)
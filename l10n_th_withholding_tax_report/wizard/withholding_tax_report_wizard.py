@@ -63,6 +63,20 @@ class WithHoldingTaxReportWizard(models.TransientModel):
         report_type = "qweb-text"
         return self._export(report_type)
 
+    def button_export_background(self):
+        """ Queue report, it is rendered by cron and sent to user when done """
+        self.ensure_one()
+        report_type = self._context.get("report_type", "xlsx")
+        name = "WT Report - {} - {}".format(
+            dict(self._fields["income_tax_form"].selection).get(
+                self.income_tax_form
+            ),
+            self.date_range_id.display_name,
+        )
+        return self.env["report.async.job"].create_job(
+            "withholding.tax.report", self._prepare_wt_report(), report_type, name
+        )
+
     def _prepare_wt_report(self):
         self.ensure_one()
         return {